@@ -1,22 +1,36 @@
 from fastapi import Depends
 from app.core.services import ModelServices
 from app.core.db import PGConnection
+from app.core.cache import get_model_cache
+from app.core.configs import get_environment
+from app.api.dependencies import get_connection
 from app.core.db.repositories import (
     ModelRepository,
+    CachedModelRepository,
     PropertyRepository,
     ModelHistoryRepository,
+    ModelProgressRepository,
 )
 
+_env = get_environment()
+
 
 def model_composer(
-    conn: PGConnection = Depends(PGConnection),
+    conn: PGConnection = Depends(get_connection),
 ) -> ModelServices:
-    model_repository = ModelRepository(connection=conn)
+    if _env.MODEL_CACHE_ENABLED:
+        model_repository = CachedModelRepository(connection=conn, cache=get_model_cache())
+
+    else:
+        model_repository = ModelRepository(connection=conn)
+
     property_repository = PropertyRepository()
     model_history_repository = ModelHistoryRepository(connection=conn)
+    model_progress_repository = ModelProgressRepository(connection=conn)
     service = ModelServices(
         model_repository=model_repository,
         property_repository=property_repository,
         model_history_repository=model_history_repository,
+        model_progress_repository=model_progress_repository,
     )
     return service
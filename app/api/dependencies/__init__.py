@@ -1 +1,2 @@
 from .bucket import Bucket
+from .database import get_connection
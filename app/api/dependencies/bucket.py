@@ -1,3 +1,4 @@
+from typing import List
 import boto3
 from boto3.s3.transfer import S3Transfer
 from botocore.exceptions import ClientError
@@ -6,6 +7,9 @@ from app.core.configs import get_environment, get_logger
 _env = get_environment()
 _logger = get_logger(__name__)
 
+# Limit of keys per S3 DeleteObjects request
+DELETE_OBJECTS_BATCH_SIZE = 1000
+
 
 class Bucket:
     @staticmethod
@@ -64,6 +68,32 @@ class Bucket:
             _logger.error(f"Error on save file in bucket: {str(error)}")
             raise Exception("Error on save file")
 
+    @classmethod
+    def delete_files(cls, bucket_paths: List[str]) -> int:
+        """Delete objects with delete_objects batches, return how many were deleted"""
+        bucket = cls.__connect_on_client()
+        deleted = 0
+
+        for start in range(0, len(bucket_paths), DELETE_OBJECTS_BATCH_SIZE):
+            batch = bucket_paths[start:start + DELETE_OBJECTS_BATCH_SIZE]
+
+            try:
+                response = bucket.delete_objects(
+                    Bucket=_env.BUCKET_NAME,
+                    Delete={"Objects": [{"Key": path} for path in batch], "Quiet": True},
+                )
+
+                errors = response.get("Errors", [])
+                deleted += len(batch) - len(errors)
+
+                for error in errors:
+                    _logger.error(f"Error on delete {error.get('Key')} from bucket: {error.get('Message')}")
+
+            except Exception as error:
+                _logger.error(f"Error on delete files from bucket: {str(error)}")
+
+        return deleted
+
     @classmethod
     def get_presigned_url(cls, path: str) -> str:
         bucket = cls.__connect_on_client()
@@ -0,0 +1,8 @@
+from typing import Iterator
+from app.core.db import PGConnection
+
+
+def get_connection() -> Iterator[PGConnection]:
+    """Request scoped connection, given back to the pool after the response"""
+    with PGConnection() as connection:
+        yield connection
@@ -1 +1,2 @@
 from .model_routes import router as model_router
+from .metrics_routes import router as metrics_router
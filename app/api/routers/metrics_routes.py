@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from app.core.metrics import export_metrics
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(content=export_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-from typing import List
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, List
 from uuid import uuid4
 from datetime import datetime
 from app.api.composers import model_composer
@@ -9,11 +10,15 @@ from app.api.shared_schemas import GWOParams
 from app.core.services import ModelServices
 from app.core.entities import (
     Property,
+    PropertyType,
     PredictedProperty,
+    PriceSweep,
+    PriceSurface,
     ModelWithHistory,
     SummarizedModel,
 )
 from app.core.configs import get_logger, get_environment
+from app.core.executors import get_io_executor, run_in_executor
 from app.worker import KombuProducer, EventSchema
 
 
@@ -21,6 +26,37 @@ router = APIRouter(prefix="/models", tags=["Models"])
 _logger = get_logger(__name__)
 _env = get_environment()
 
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+async def spool_upload(request: Request) -> UploadFile:
+    """
+    Read the whole request body before answering, StreamingResponse listens
+    for disconnects on the same receive channel and would take body parts
+    """
+    upload = UploadFile(file=SpooledTemporaryFile(max_size=_env.BULK_PREDICTION_SPOOL_MAX_BYTES))
+
+    try:
+        async for chunk in request.stream():
+            await upload.write(chunk)
+
+        await upload.seek(0)
+
+    except BaseException:
+        await upload.close()
+        raise
+
+    return upload
+
+
+async def read_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+    try:
+        while chunk := await upload.read(UPLOAD_READ_SIZE):
+            yield chunk
+
+    finally:
+        await upload.close()
+
 
 @router.post("/train")
 async def train_model(
@@ -28,7 +64,9 @@ async def train_model(
     name: str = "Grey Wolf V2",
     services: ModelServices = Depends(model_composer),
 ):
-    model_in_db = services.pre_create_model(name=name, gwo_params=gwo_params)
+    model_in_db = await run_in_executor(
+        get_io_executor(), services.pre_create_model, name=name, gwo_params=gwo_params
+    )
 
     if model_in_db:
         event = EventSchema(
@@ -40,7 +78,7 @@ async def train_model(
             updated_at=datetime.now()
         )
 
-        KombuProducer.send_messages(message=event)
+        await run_in_executor(get_io_executor(), KombuProducer.send_messages, message=event)
 
         return JSONResponse(
             status_code=201,
@@ -63,10 +101,15 @@ async def train_model(
 
 @router.post("/predict/price", responses={200: {"model": PredictedProperty}})
 async def predict_price(
-    property: Property, model_id: int=None, services: ModelServices = Depends(model_composer)
+    property: Property,
+    model_id: int=None,
+    property_type: PropertyType=None,
+    services: ModelServices = Depends(model_composer),
 ):
     try:
-        predicted_property = services.predict_price(model_id=model_id, property=property)
+        predicted_property = await services.predict_price(
+            model_id=model_id, property=property, property_type=property_type
+        )
 
         if predicted_property:
             return JSONResponse(
@@ -88,19 +131,98 @@ async def predict_price(
         )
 
 
+@router.post("/predict/price/bulk")
+async def predict_price_bulk(
+    request: Request,
+    model_id: int=None,
+    property_type: PropertyType=None,
+    services: ModelServices = Depends(model_composer),
+):
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    upload = await spool_upload(request)
+
+    try:
+        priced_rows = await services.predict_price_bulk(
+            model_id=model_id, stream=read_upload(upload), ndjson=ndjson, property_type=property_type
+        )
+
+        if priced_rows:
+            return StreamingResponse(
+                priced_rows,
+                media_type="application/x-ndjson" if ndjson else "text/csv",
+            )
+
+        else:
+            await upload.close()
+            return JSONResponse(
+                status_code=404,
+                content=jsonable_encoder({"message": "Model not found"}),
+            )
+
+    except Exception as error:
+        await upload.close()
+        _logger.error(f"Error on predict_price_bulk: {str(error)}")
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder({"message": f"Some error happen: {str(error)}"}),
+        )
+
+
+@router.post("/predict/price/sweep", responses={200: {"model": PriceSurface}})
+async def predict_price_sweep(
+    sweep: PriceSweep,
+    model_id: int=None,
+    property_type: PropertyType=None,
+    services: ModelServices = Depends(model_composer),
+):
+    try:
+        price_surface = await services.predict_price_sweep(
+            model_id=model_id, sweep=sweep, property_type=property_type
+        )
+
+        if price_surface:
+            return JSONResponse(
+                status_code=200,
+                content=jsonable_encoder(price_surface.model_dump()),
+            )
+
+        else:
+            return JSONResponse(
+                status_code=404,
+                content=jsonable_encoder({"message": "Model not found"}),
+            )
+
+    except Exception as error:
+        _logger.error(f"Error on predict_price_sweep: {str(error)}")
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder({"message": f"Some error happen: {str(error)}"}),
+        )
+
+
 @router.get("", responses={200: {"model": List[ModelWithHistory]}})
 async def get_trained_models(
     page: int = Query(default=1, gt=0),
     page_size: int = Query(default=10, gt=0),
+    cursor: str = Query(default=None, description="X-Next-Cursor of the previous page, replaces page"),
+    include_history: bool = Query(default=True),
     services: ModelServices = Depends(model_composer),
 ):
     try:
-        models = services.search_models(page=page, page_size=page_size)
+        models, next_cursor = await run_in_executor(
+            get_io_executor(),
+            services.search_models,
+            page_size=page_size,
+            page=page,
+            cursor=cursor,
+            include_history=include_history,
+        )
 
         if models:
             return JSONResponse(
                 status_code=200,
                 content=jsonable_encoder([model.model_dump() for model in models]),
+                headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
             )
 
         else:
@@ -119,10 +241,11 @@ async def get_trained_models(
 
 @router.get("/statistics", responses={200: {"model": List[ModelWithHistory]}})
 async def get_models_statistics(
+    window_days: int = Query(default=None, gt=0, description="Defaults to MODEL_STATISTICS_WINDOW_DAYS"),
     services: ModelServices = Depends(model_composer),
 ):
     try:
-        statistics = services.search_statistics()
+        statistics = await run_in_executor(get_io_executor(), services.search_statistics, window_days=window_days)
 
         if statistics:
             return JSONResponse(
@@ -144,12 +267,36 @@ async def get_models_statistics(
         )
 
 
+@router.post("/prune")
+async def prune_models(
+    older_than_days: int = Query(default=None, gt=0, description="Defaults to MODEL_PRUNE_OLDER_THAN_DAYS"),
+    keep_ready: int = Query(default=None, gt=0, description="Newest READY models kept per property type, defaults to MODEL_PRUNE_KEEP_READY"),
+    services: ModelServices = Depends(model_composer),
+):
+    try:
+        deleted = await run_in_executor(
+            get_io_executor(), services.prune_models, older_than_days=older_than_days, keep_ready=keep_ready
+        )
+
+        return JSONResponse(
+            status_code=200,
+            content=jsonable_encoder({"message": f"{len(deleted)} models deleted", "data": deleted}),
+        )
+
+    except Exception as error:
+        _logger.error(f"Error on prune_models: {str(error)}")
+        return JSONResponse(
+            status_code=400,
+            content=jsonable_encoder({"message": f"Some error happen: {str(error)}"}),
+        )
+
+
 @router.get("/{model_id}", responses={200: {"model": SummarizedModel}})
 async def get_model_by_id(
     model_id: int, services: ModelServices = Depends(model_composer)
 ):
     try:
-        model = services.search_model_by_id(id=model_id)
+        model = await run_in_executor(get_io_executor(), services.search_model_by_id, id=model_id)
 
         if model:
             return JSONResponse(
@@ -174,7 +321,7 @@ async def delete_model_by_id(
     model_id: int, services: ModelServices = Depends(model_composer)
 ):
     try:
-        model = services.delete_model_by_id(id=model_id)
+        model = await run_in_executor(get_io_executor(), services.delete_model_by_id, id=model_id)
 
         if model:
             return JSONResponse(
@@ -1,9 +1,16 @@
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
-from app.api.routers import model_router
+from app.api.routers import model_router, metrics_router
+from app.core.configs import get_environment
+from app.core.db import Migrator
+
+_env = get_environment()
 
 
 def create_app() -> FastAPI:
+    if _env.DATABASE_MIGRATE_ON_STARTUP:
+        Migrator().migrate()
+
     app = FastAPI(
         title="GreyWolf Services"
     )
@@ -17,5 +24,6 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(model_router)
+    app.include_router(metrics_router)
 
     return app
@@ -0,0 +1,56 @@
+"""
+Cache Module
+"""
+
+from functools import lru_cache
+from app.core.configs import get_environment
+from app.core.cache.artifact_cache import ArtifactCache
+from app.core.cache.dataset_cache import DatasetCache
+from app.core.cache.split_cache import SplitCache
+from app.core.cache.model_cache import ModelCache
+from app.core.db.model_change_listener import ModelChangeListener
+
+
+@lru_cache()
+def get_artifact_cache() -> ArtifactCache:
+    """Helper function to get the host artifact cache"""
+    _env = get_environment()
+    return ArtifactCache(
+        directory=_env.ARTIFACT_CACHE_DIR,
+        max_bytes=_env.ARTIFACT_CACHE_MAX_BYTES,
+    )
+
+
+@lru_cache()
+def get_dataset_cache() -> DatasetCache:
+    """Helper function to get the host dataset snapshot cache"""
+    _env = get_environment()
+    return DatasetCache(
+        directory=_env.DATASET_CACHE_DIR,
+        max_snapshots=_env.DATASET_CACHE_MAX_SNAPSHOTS,
+    )
+
+
+@lru_cache()
+def get_split_cache() -> SplitCache:
+    """Helper function to get the host train/test split cache"""
+    _env = get_environment()
+    return SplitCache(
+        directory=_env.SPLIT_CACHE_DIR,
+        max_splits=_env.SPLIT_CACHE_MAX_SPLITS,
+    )
+
+
+@lru_cache()
+def get_model_cache() -> ModelCache:
+    """Helper function to get the process model cache, invalidated by its own listener thread"""
+    _env = get_environment()
+    cache = ModelCache(max_models=_env.MODEL_CACHE_MAX_MODELS)
+
+    ModelChangeListener(
+        on_change=cache.invalidate,
+        on_connect=cache.enable,
+        on_disconnect=cache.disable,
+    ).start()
+
+    return cache
@@ -0,0 +1,197 @@
+"""
+Module for the host-wide model artifact cache
+"""
+
+import fcntl
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+import requests
+from app.api.dependencies import Bucket
+from app.core.configs import get_logger
+from app.core.metrics import track_cache, track_stage
+
+_logger = get_logger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+READ_ATTEMPTS = 3
+
+
+class ArtifactCache:
+    """
+    Disk cache for bucket artifacts shared by every process on the host.
+
+    Each bucket path is downloaded once per host and mapped to its object
+    through a small ref file (objects are named after the sha256 of their
+    content), every write is atomic (temporary file + rename) and the least
+    recently used objects are evicted above max_bytes. Files must be read
+    inside reading(), eviction waits for the readers.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.__objects_directory = os.path.join(directory, "objects")
+        self.__refs_directory = os.path.join(directory, "refs")
+        self.__locks_directory = os.path.join(directory, "locks")
+        self.__max_bytes = max_bytes
+
+        for path in (self.__objects_directory, self.__refs_directory, self.__locks_directory):
+            os.makedirs(path, exist_ok=True)
+
+    def get_file(self, bucket_path: str) -> str:
+        """
+        Return a local path with the artifact content, downloading it only
+        when no process on this host has done it before
+        """
+        key = self.__key(bucket_path)
+
+        object_path = self.__read_ref(key)
+        if object_path:
+            track_cache("artifact", hit=True)
+            return object_path
+
+        with self.__lock(key):
+            object_path = self.__read_ref(key)
+            if object_path:
+                track_cache("artifact", hit=True)
+                return object_path
+
+            track_cache("artifact", hit=False)
+
+            _logger.info(f"Downloading artifact {bucket_path}")
+            object_path = self.__download(bucket_path)
+            self.__write_ref(key, object_path)
+
+        self.__evict(keep=object_path)
+
+        return object_path
+
+    @contextmanager
+    def reading(self, bucket_path: str):
+        """
+        Yield the local path of the artifact, no process evicts it until the
+        block ends
+        """
+        for _ in range(READ_ATTEMPTS):
+            object_path = self.get_file(bucket_path)
+
+            with self.__lock("eviction", shared=True):
+                # Evicted by another process between get_file and the lock, fetch it again
+                if not os.path.exists(object_path):
+                    continue
+
+                yield object_path
+                return
+
+        raise FileNotFoundError(f"Artifact {bucket_path} evicted while being read")
+
+    def put(self, bucket_path: str, file_path: str) -> str:
+        """
+        Store a local file as the content of bucket_path (used after uploads)
+        """
+        key = self.__key(bucket_path)
+
+        with self.__lock(key):
+            with open(file_path, "rb") as source:
+                object_path = self.__store(source, suffix=self.__suffix(bucket_path))
+
+            self.__write_ref(key, object_path)
+
+        self.__evict(keep=object_path)
+
+        return object_path
+
+    def __download(self, bucket_path: str) -> str:
+        with track_stage("presigned_url"):
+            sign_url = Bucket.get_presigned_url(path=bucket_path)
+
+        with track_stage("artifact_download"):
+            with requests.get(sign_url, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+
+                return self.__store(response.raw, suffix=self.__suffix(bucket_path))
+
+    def __store(self, source, suffix: str) -> str:
+        digest = hashlib.sha256()
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.__objects_directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(file_descriptor, "wb") as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    target.write(chunk)
+
+            object_path = os.path.join(self.__objects_directory, f"{digest.hexdigest()}{suffix}")
+            os.replace(temp_path, object_path)
+
+            return object_path
+
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            raise
+
+    def __read_ref(self, key: str) -> str:
+        try:
+            with open(os.path.join(self.__refs_directory, key), "r") as ref:
+                object_path = os.path.join(self.__objects_directory, ref.read().strip())
+
+            os.utime(object_path)
+            return object_path
+
+        except FileNotFoundError:
+            return None
+
+    def __write_ref(self, key: str, object_path: str):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.__refs_directory, suffix=".tmp")
+
+        with os.fdopen(file_descriptor, "w") as ref:
+            ref.write(os.path.basename(object_path))
+
+        os.replace(temp_path, os.path.join(self.__refs_directory, key))
+
+    def __evict(self, keep: str):
+        with self.__lock("eviction"):
+            objects = []
+            total_size = 0
+
+            for entry in os.scandir(self.__objects_directory):
+                if entry.name.endswith(".tmp"):
+                    continue
+
+                stat = entry.stat()
+                objects.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+            for _, size, path in sorted(objects):
+                if total_size <= self.__max_bytes:
+                    break
+
+                if path == keep:
+                    continue
+
+                try:
+                    os.remove(path)
+                    total_size -= size
+                    _logger.info(f"Artifact evicted from cache {os.path.basename(path)}")
+
+                except FileNotFoundError:
+                    ...
+
+    @contextmanager
+    def __lock(self, name: str, shared: bool = False):
+        with open(os.path.join(self.__locks_directory, f"{name}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __key(self, bucket_path: str) -> str:
+        return hashlib.sha256(bucket_path.encode("utf-8")).hexdigest()
+
+    def __suffix(self, bucket_path: str) -> str:
+        return os.path.splitext(bucket_path)[1]
@@ -0,0 +1,159 @@
+"""
+Module for the property export snapshot cache
+"""
+
+import fcntl
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Tuple
+import pandas as pd
+import requests
+from app.core.configs import get_logger
+from app.core.metrics import track_cache
+
+_logger = get_logger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class DatasetCache:
+    """
+    Parquet snapshots of parsed property exports.
+
+    Snapshots are identified by the sha256 of the export content and stored
+    per parsing variant (which must change with the parsing code); the export ETag is mapped to that id, so an unchanged
+    export is neither downloaded nor parsed again.
+    """
+
+    def __init__(self, directory: str, max_snapshots: int) -> None:
+        self.__snapshots_directory = os.path.join(directory, "snapshots")
+        self.__refs_directory = os.path.join(directory, "refs")
+        self.__locks_directory = os.path.join(directory, "locks")
+        self.__max_snapshots = max_snapshots
+
+        for path in (self.__snapshots_directory, self.__refs_directory, self.__locks_directory):
+            os.makedirs(path, exist_ok=True)
+
+    def load(self, file_url: str, variant: str, parse: Callable[[str], pd.DataFrame]) -> Tuple[str, pd.DataFrame]:
+        """
+        Return the snapshot id and the export behind file_url parsed by parse
+        """
+        with requests.get(file_url, stream=True) as response:
+            response.raise_for_status()
+
+            etag = response.headers.get("ETag", "").strip('"')
+            snapshot_id = self.__read_ref(etag) if etag else None
+
+            if snapshot_id:
+                dataframe = self.__read_snapshot(snapshot_id, variant)
+
+                if dataframe is not None:
+                    track_cache("dataset", hit=True)
+                    _logger.info(f"Dataset snapshot {snapshot_id} reused for ETag {etag}")
+                    return snapshot_id, dataframe
+
+            with tempfile.TemporaryDirectory() as temp_dir:
+                export_path = os.path.join(temp_dir, "export.csv")
+                snapshot_id = self.__download(response, export_path)
+
+                if etag:
+                    self.__write_ref(etag, snapshot_id)
+
+                dataframe = self.__read_snapshot(snapshot_id, variant)
+
+                if dataframe is not None:
+                    track_cache("dataset", hit=True)
+                    return snapshot_id, dataframe
+
+                track_cache("dataset", hit=False)
+                dataframe = parse(export_path)
+
+        self.__write_snapshot(snapshot_id, variant, dataframe)
+
+        return snapshot_id, dataframe
+
+    def __download(self, response: requests.Response, export_path: str) -> str:
+        digest = hashlib.sha256()
+
+        with open(export_path, "wb") as export_file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                digest.update(chunk)
+                export_file.write(chunk)
+
+        return digest.hexdigest()
+
+    def __snapshot_path(self, snapshot_id: str, variant: str) -> str:
+        return os.path.join(self.__snapshots_directory, f"{snapshot_id}-{variant}.parquet")
+
+    def __read_snapshot(self, snapshot_id: str, variant: str) -> pd.DataFrame:
+        path = self.__snapshot_path(snapshot_id, variant)
+
+        try:
+            dataframe = pd.read_parquet(path)
+            os.utime(path)
+            return dataframe
+
+        except FileNotFoundError:
+            return None
+
+    def __write_snapshot(self, snapshot_id: str, variant: str, dataframe: pd.DataFrame):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.__snapshots_directory, suffix=".tmp")
+        os.close(file_descriptor)
+
+        try:
+            dataframe.to_parquet(temp_path)
+
+            # Storing and evicting are serialized between processes, eviction never sees half a store
+            with self.__lock():
+                os.replace(temp_path, self.__snapshot_path(snapshot_id, variant))
+                self.__evict()
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def __read_ref(self, etag: str) -> str:
+        try:
+            with open(os.path.join(self.__refs_directory, self.__key(etag)), "r") as ref:
+                return ref.read().strip()
+
+        except FileNotFoundError:
+            return None
+
+    def __write_ref(self, etag: str, snapshot_id: str):
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.__refs_directory, suffix=".tmp")
+
+        with os.fdopen(file_descriptor, "w") as ref:
+            ref.write(snapshot_id)
+
+        os.replace(temp_path, os.path.join(self.__refs_directory, self.__key(etag)))
+
+    def __evict(self):
+        snapshots = sorted(
+            (entry for entry in os.scandir(self.__snapshots_directory) if entry.name.endswith(".parquet")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+
+        for entry in snapshots[self.__max_snapshots:]:
+            try:
+                os.remove(entry.path)
+                _logger.info(f"Dataset snapshot evicted {entry.name}")
+
+            except FileNotFoundError:
+                ...
+
+    @contextmanager
+    def __lock(self):
+        with open(os.path.join(self.__locks_directory, "snapshots.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __key(self, etag: str) -> str:
+        return hashlib.sha256(etag.encode("utf-8")).hexdigest()
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from pydantic import BaseModel
+import threading
+from app.core.configs import get_logger
+from app.core.metrics import track_cache
+
+_logger = get_logger(__name__)
+
+LATEST = "latest"
+
+
+class ModelCache:
+    """
+    Process cache of model rows, kept coherent by the model change listener.
+
+    Rows are only served while the listener is connected, a missed
+    notification would otherwise keep a stale row forever. A load that
+    raced with an invalidation is returned but not stored.
+    """
+
+    def __init__(self, max_models: int) -> None:
+        self.__max_models = max_models
+        self.__rows: OrderedDict = OrderedDict()
+        self.__generation = 0
+        self.__enabled = False
+        self.__lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    def get(self, kind: str, model_id: int, load: Callable[[], Optional[BaseModel]]) -> Optional[BaseModel]:
+        return self.__read_through(key=(kind, model_id), load=load)
+
+    def get_latest(self, property_type: Hashable, load: Callable[[], Optional[BaseModel]]) -> Optional[BaseModel]:
+        return self.__read_through(key=(LATEST, property_type), load=load)
+
+    def invalidate(self, model_id: int):
+        """Drop the rows of a model and every latest pointer, the change may have made another model the latest"""
+        with self.__lock:
+            self.__generation += 1
+
+            for key in list(self.__rows):
+                if key[0] == LATEST or key[1] == model_id:
+                    del self.__rows[key]
+
+    def enable(self):
+        with self.__lock:
+            self.__enabled = True
+
+    def disable(self):
+        """Notifications may have been lost, stop serving and drop everything cached so far"""
+        with self.__lock:
+            self.__enabled = False
+            self.__generation += 1
+            self.__rows.clear()
+
+    def __read_through(self, key: tuple, load: Callable[[], Optional[BaseModel]]) -> Optional[BaseModel]:
+        with self.__lock:
+            enabled = self.__enabled
+            generation = self.__generation
+            row = self.__rows.get(key) if enabled else None
+
+            if row is not None:
+                self.__rows.move_to_end(key)
+
+        if not enabled:
+            return load()
+
+        track_cache("model_row", hit=row is not None)
+
+        if row is None:
+            row = load()
+
+            if row is None:
+                return None
+
+            with self.__lock:
+                if self.__enabled and generation == self.__generation:
+                    self.__rows[key] = row
+
+                    while len(self.__rows) > self.__max_models:
+                        self.__rows.popitem(last=False)
+
+        # Callers fill fields like remaining_time_in_seconds on the rows they get
+        return row.model_copy(deep=True)
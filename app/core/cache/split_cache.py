@@ -0,0 +1,139 @@
+"""
+Module for the train/test split cache
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict
+import numpy as np
+from scipy import sparse
+from app.core.configs import get_logger
+from app.core.metrics import track_cache
+
+_logger = get_logger(__name__)
+
+CSR_PARTS = ("data", "indices", "indptr")
+
+
+class SplitCache:
+    """
+    Scaled train/test splits stored as .npy files, one directory per dataset
+    snapshot and preprocessing config.
+
+    Splits are loaded with mmap_mode="r", so every trainer on the host shares
+    the same read-only pages instead of holding its own copy. CSR matrices are
+    stored as their data, indices and indptr arrays.
+    """
+
+    def __init__(self, directory: str, max_splits: int) -> None:
+        self.__directory = directory
+        self.__max_splits = max_splits
+
+        os.makedirs(self.__directory, exist_ok=True)
+
+    def key(self, dataset_snapshot: str, config: dict) -> str:
+        content = json.dumps({"dataset_snapshot": dataset_snapshot, **config}, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Dict[str, object]:
+        """
+        Return the memory-mapped arrays of a split, or None when it was not
+        stored yet
+        """
+        arrays = self.__read(key)
+
+        if arrays is None:
+            track_cache("split", hit=False)
+            return None
+
+        track_cache("split", hit=True)
+        _logger.info(f"Split {key} reused")
+
+        return arrays
+
+    def store(self, key: str, arrays: Dict[str, object]) -> Dict[str, object]:
+        """
+        Store the arrays of a split (dense arrays or CSR matrices) and return
+        them memory-mapped, or as given when they could not be stored
+        """
+        temp_directory = None
+
+        try:
+            temp_directory = tempfile.mkdtemp(dir=self.__directory, suffix=".tmp")
+            manifest = {}
+
+            for name, array in arrays.items():
+                manifest[name] = self.__save_array(temp_directory, name, array)
+
+            with open(os.path.join(temp_directory, "manifest.json"), "w") as manifest_file:
+                json.dump(manifest, manifest_file)
+
+            # Another process may have stored the same split meanwhile, both are equal
+            os.rename(temp_directory, os.path.join(self.__directory, key))
+
+        except OSError as error:
+            if temp_directory is not None:
+                shutil.rmtree(temp_directory, ignore_errors=True)
+
+            _logger.warning(f"Split {key} not stored: {str(error)}")
+
+        self.__evict(keep=key)
+
+        stored = self.__read(key)
+
+        return arrays if stored is None else stored
+
+    def __read(self, key: str) -> Dict[str, object]:
+        split_directory = os.path.join(self.__directory, key)
+
+        try:
+            with open(os.path.join(split_directory, "manifest.json"), "r") as manifest_file:
+                manifest = json.load(manifest_file)
+
+            arrays = {name: self.__load_array(split_directory, name, shape) for name, shape in manifest.items()}
+            os.utime(split_directory)
+
+        except FileNotFoundError:
+            return None
+
+        return arrays
+
+    def __save_array(self, directory: str, name: str, array) -> list:
+        if sparse.issparse(array):
+            array = sparse.csr_matrix(array)
+
+            for part in CSR_PARTS:
+                np.save(os.path.join(directory, f"{name}.{part}.npy"), getattr(array, part))
+
+            return list(array.shape)
+
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+        return None
+
+    def __load_array(self, directory: str, name: str, shape: list):
+        if shape is None:
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+        data, indices, indptr = (
+            np.load(os.path.join(directory, f"{name}.{part}.npy"), mmap_mode="r") for part in CSR_PARTS
+        )
+
+        return sparse.csr_matrix((data, indices, indptr), shape=tuple(shape), copy=False)
+
+    def __evict(self, keep: str):
+        splits = sorted(
+            (entry for entry in os.scandir(self.__directory) if entry.is_dir() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+
+        for entry in splits[self.__max_splits:]:
+            if entry.name == keep:
+                continue
+
+            shutil.rmtree(entry.path, ignore_errors=True)
+            _logger.info(f"Split evicted {entry.name}")
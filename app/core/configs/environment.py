@@ -15,6 +15,9 @@ class Environment(BaseSettings):
     APPLICATION_PORT: int = 8000
     APPLICATION_NAME: str = "GreyWolf Service"
     MODEL_MINIMAL_AGE: int = 5
+    APPLICATION_WORKERS: int = 1
+    IO_WORKERS: int = 32
+    INFERENCE_WORKERS: int = 2
 
     # DATABASE
     DATABASE_URL: str = "localhost:5432"
@@ -24,6 +27,15 @@ class Environment(BaseSettings):
     DATABASE_PASSWORD: str = "password"
     DATABASE_NAME: str = "test"
     ENVIRONMENT: str = "test"
+    DATABASE_POOL_MIN_SIZE: int = 1
+    DATABASE_POOL_MAX_SIZE: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_MAX_IDLE: float = 600
+    DATABASE_POOL_HEALTH_CHECK: bool = True
+    DATABASE_RETRY_ATTEMPTS: int = 5
+    DATABASE_RETRY_BASE_SECONDS: float = 0.1
+    DATABASE_RETRY_MAX_SECONDS: float = 5
+    DATABASE_MIGRATE_ON_STARTUP: bool = False
 
     # S3
     BUCKET_BASE_URL: str = "localhost"
@@ -33,10 +45,40 @@ class Environment(BaseSettings):
     BUCKET_ACL: str = "test"
     BUCKET_URL_EXPIRES_IN_SECONDS: int = 0
 
+    # ARTIFACT CACHE
+    ARTIFACT_CACHE_DIR: str = "/tmp/greywolf/artifacts"
+    ARTIFACT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # DATASET CACHE
+    DATASET_CACHE_DIR: str = "/tmp/greywolf/datasets"
+    DATASET_CACHE_MAX_SNAPSHOTS: int = 5
+
+    # SPLIT CACHE
+    SPLIT_CACHE_DIR: str = "/tmp/greywolf/splits"
+    SPLIT_CACHE_MAX_SPLITS: int = 10
+
+    # MODEL CACHE
+    MODEL_CACHE_ENABLED: bool = True
+    MODEL_CACHE_MAX_MODELS: int = 256
+
     # GREY WOLF
     GWO_EPOCH: int = 500
     GWO_POP_SIZE: int = 10
     TEST_SIZE: float = 0.25
+    PROPERTY_EXPORT_CHUNK_SIZE: int = 0
+    SPARSE_FEATURES: bool = True
+    MODEL_PROGRESS_EWMA_ALPHA: float = 0.2
+    MODEL_STATISTICS_WINDOW_DAYS: int = 2
+    MODEL_PRUNE_OLDER_THAN_DAYS: int = 30
+    MODEL_PRUNE_KEEP_READY: int = 3
+
+    # PREDICTION
+    PREDICTION_BATCH_WINDOW_MS: float = 3
+    PREDICTION_BATCH_MAX_SIZE: int = 64
+    PREDICTION_MAX_MODELS: int = 4
+    BULK_PREDICTION_CHUNK_SIZE: int = 512
+    BULK_PREDICTION_SPOOL_MAX_BYTES: int = 8 * 1024 * 1024
+    PREDICTION_SWEEP_MAX_POINTS: int = 10000
 
     # PROPERTY API
     PROPERTY_API_URL: str
@@ -1,2 +1,3 @@
 from .pg_connection import PGConnection
 from .base_connection import DBConnection
+from .migrator import Migrator
@@ -4,7 +4,7 @@ from abc import ABC, abstractmethod
 class DBConnection(ABC):
 
     @abstractmethod
-    def execute(self, sql_statement: str, values: tuple = None):
+    def execute(self, sql_statement: str, values: tuple = None, prepare: bool = None):
         """
         Method to execute query
         """
@@ -28,7 +28,7 @@ class DBConnection(ABC):
         """
 
     @abstractmethod
-    def fetch_with_retry(self, sql_statement: str, values: tuple = None, all=False):
+    def fetch_with_retry(self, sql_statement: str, values: tuple = None, all=False, prepare: bool = None):
         """
         Method to get all or one occurence from database
         """
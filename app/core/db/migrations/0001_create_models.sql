@@ -0,0 +1,27 @@
+-- Models and the history of every GWO evaluation, IF NOT EXISTS adopts databases created before the migrations
+CREATE TABLE IF NOT EXISTS models (
+    id serial PRIMARY KEY,
+    "path" varchar NOT NULL DEFAULT '',
+    created_at timestamp NOT NULL DEFAULT NOW(),
+    updated_at timestamp NOT NULL DEFAULT NOW(),
+    x_min_max_scaler varchar NOT NULL DEFAULT '',
+    y_min_max_scaler varchar NOT NULL DEFAULT '',
+    neighborhood_encoder varchar NOT NULL DEFAULT '',
+    one_hot_encoder varchar NOT NULL DEFAULT '',
+    mse double precision NOT NULL DEFAULT 0,
+    name varchar NOT NULL DEFAULT '',
+    status varchar NOT NULL DEFAULT 'SCHEDULED',
+    gwo_params jsonb NOT NULL DEFAULT '{}',
+    epochs integer,
+    population_size integer
+);
+
+CREATE TABLE IF NOT EXISTS model_histories (
+    id serial PRIMARY KEY,
+    model_id integer NOT NULL REFERENCES models (id),
+    epoch integer NOT NULL,
+    mse double precision NOT NULL DEFAULT 1,
+    params jsonb NOT NULL DEFAULT '{}',
+    created_at timestamp NOT NULL DEFAULT NOW(),
+    updated_at timestamp NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,3 @@
+ALTER TABLE models ADD COLUMN IF NOT EXISTS preprocessing_pipeline varchar NOT NULL DEFAULT '';
+ALTER TABLE models ADD COLUMN IF NOT EXISTS dataset_snapshot varchar NOT NULL DEFAULT '';
+ALTER TABLE models ADD COLUMN IF NOT EXISTS preprocessing_state varchar NOT NULL DEFAULT '';
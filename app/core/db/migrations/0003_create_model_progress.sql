@@ -0,0 +1,8 @@
+-- One row per training model, updated after every evaluation
+CREATE TABLE IF NOT EXISTS model_progress (
+    model_id integer PRIMARY KEY REFERENCES models (id) ON DELETE CASCADE,
+    completed integer NOT NULL DEFAULT 0,
+    total integer NOT NULL DEFAULT 0,
+    ewma_seconds double precision NOT NULL DEFAULT 0,
+    updated_at timestamp NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,17 @@
+-- Status filters and counts over created_at ranges
+CREATE INDEX IF NOT EXISTS models_status_created_at_idx
+    ON models (status, created_at DESC);
+
+-- Listing and latest READY model, also serves the (created_at, id) keyset
+CREATE INDEX IF NOT EXISTS models_ready_created_at_idx
+    ON models (created_at DESC, id DESC)
+    WHERE status = 'READY';
+
+-- Latest READY preprocessing state of a property type
+CREATE INDEX IF NOT EXISTS models_ready_property_type_idx
+    ON models ((gwo_params ->> 'property_type'), created_at DESC)
+    WHERE status = 'READY';
+
+-- History lookups by model_id = ANY(...) ordered by epoch
+CREATE INDEX IF NOT EXISTS model_histories_model_id_epoch_idx
+    ON model_histories (model_id, epoch);
@@ -0,0 +1,41 @@
+-- Models created per day and current status, kept by trigger so statistics never scan models
+CREATE TABLE IF NOT EXISTS model_status_daily (
+    day date NOT NULL,
+    status varchar NOT NULL,
+    count integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, status)
+);
+
+CREATE OR REPLACE FUNCTION track_model_status_daily() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE model_status_daily
+        SET count = count - 1
+        WHERE day = OLD.created_at::date AND status = OLD.status;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO model_status_daily (day, status, count)
+        VALUES (NEW.created_at::date, NEW.status, 1)
+        ON CONFLICT (day, status) DO UPDATE SET count = model_status_daily.count + 1;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS models_status_daily_trigger ON models;
+
+CREATE TRIGGER models_status_daily_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF status, created_at ON models
+    FOR EACH ROW EXECUTE FUNCTION track_model_status_daily();
+
+-- Rebuilt inside the migration transaction, writes to models wait for it
+LOCK TABLE models IN SHARE ROW EXCLUSIVE MODE;
+
+DELETE FROM model_status_daily;
+
+INSERT INTO model_status_daily (day, status, count)
+SELECT created_at::date, status, count(id)
+FROM models
+GROUP BY created_at::date, status;
@@ -0,0 +1,27 @@
+-- Lets every API replica drop its cached copy of a model row as soon as it changes
+CREATE OR REPLACE FUNCTION notify_model_change() RETURNS trigger AS $$
+DECLARE
+    model record;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        model := OLD;
+    ELSE
+        model := NEW;
+    END IF;
+
+    PERFORM pg_notify('model_changes', json_build_object(
+        'schema', TG_TABLE_SCHEMA,
+        'operation', TG_OP,
+        'id', model.id,
+        'status', model.status
+    )::text);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS models_notify_change_trigger ON models;
+
+CREATE TRIGGER models_notify_change_trigger
+    AFTER INSERT OR UPDATE OR DELETE ON models
+    FOR EACH ROW EXECUTE FUNCTION notify_model_change();
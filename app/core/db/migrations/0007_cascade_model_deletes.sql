@@ -0,0 +1,21 @@
+-- Deleting a model removes its history in the same statement. Legacy databases may have had
+-- another or no foreign key, NOT VALID skips checking old rows and still cascades
+DO $$
+DECLARE
+    constraint_name text;
+BEGIN
+    FOR constraint_name IN
+        SELECT c.conname
+        FROM pg_constraint c
+        WHERE c.conrelid = 'model_histories'::regclass
+            AND c.confrelid = 'models'::regclass
+            AND c.contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE model_histories DROP CONSTRAINT %I', constraint_name);
+    END LOOP;
+END;
+$$;
+
+ALTER TABLE model_histories
+    ADD CONSTRAINT model_histories_model_id_fkey
+    FOREIGN KEY (model_id) REFERENCES models (id) ON DELETE CASCADE NOT VALID;
@@ -0,0 +1,22 @@
+-- Fixed GWO hyperparameters as typed columns, read without decoding a JSON document per evaluation
+ALTER TABLE model_histories ADD COLUMN IF NOT EXISTS max_iter integer;
+ALTER TABLE model_histories ADD COLUMN IF NOT EXISTS learning_rate double precision;
+ALTER TABLE model_histories ADD COLUMN IF NOT EXISTS momentum double precision;
+ALTER TABLE model_histories ADD COLUMN IF NOT EXISTS batch_size integer;
+ALTER TABLE model_histories ADD COLUMN IF NOT EXISTS hidden_layer_sizes integer[];
+
+-- New rows only fill the typed columns, the params of older rows are kept as they are
+ALTER TABLE model_histories ALTER COLUMN params SET DEFAULT '{}';
+
+UPDATE model_histories
+SET
+    max_iter = (params::jsonb ->> 'max_iter')::integer,
+    learning_rate = (params::jsonb ->> 'learning_rate')::double precision,
+    momentum = (params::jsonb ->> 'momentum')::double precision,
+    batch_size = (params::jsonb ->> 'batch_size')::integer,
+    hidden_layer_sizes = ARRAY(
+        SELECT jsonb_array_elements_text(params::jsonb -> 'hidden_layer_sizes')::integer
+    )
+WHERE
+    max_iter IS NULL
+    AND params::jsonb ? 'max_iter';
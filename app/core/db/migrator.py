@@ -0,0 +1,129 @@
+from typing import List, NamedTuple
+from psycopg import sql
+import hashlib
+import os
+import re
+from app.core.db.pg_connection import get_connection_pool
+from app.core.configs import get_environment, get_logger
+
+_env = get_environment()
+_logger = get_logger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Any constant shared by every process migrating the same database
+MIGRATION_LOCK = 7_204_573
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: str
+
+    def read(self) -> str:
+        with open(self.path, encoding="utf-8") as file:
+            return file.read()
+
+    def checksum(self) -> str:
+        return hashlib.sha256(self.read().encode("utf-8")).hexdigest()
+
+
+class Migrator:
+    """
+    Applies the numbered .sql files of the migrations folder that are not in
+    schema_migrations yet, each one in its own transaction
+    """
+
+    def __init__(self, migrations_dir: str = MIGRATIONS_DIR) -> None:
+        self.__migrations_dir = migrations_dir
+
+    def migrations(self) -> List[Migration]:
+        migrations = []
+
+        for file_name in os.listdir(self.__migrations_dir):
+            match = MIGRATION_FILE.match(file_name)
+
+            if match:
+                migrations.append(Migration(
+                    version=int(match.group(1)),
+                    name=match.group(2),
+                    path=os.path.join(self.__migrations_dir, file_name),
+                ))
+
+        versions = [migration.version for migration in migrations]
+
+        if len(set(versions)) != len(versions):
+            raise Exception(f"Duplicated migration versions in {self.__migrations_dir}")
+
+        return sorted(migrations)
+
+    def applied(self) -> dict:
+        with get_connection_pool().connection() as conn:
+            self.__create_migrations_table(conn)
+
+            return {
+                row["version"]: row["checksum"]
+                for row in conn.execute("SELECT version, checksum FROM schema_migrations;").fetchall()
+            }
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied()
+
+        return [migration for migration in self.migrations() if migration.version not in applied]
+
+    def migrate(self) -> List[Migration]:
+        executed = []
+
+        with get_connection_pool().connection() as conn:
+            # Every API worker may run this on startup, only one of them migrates at a time
+            conn.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK,))
+
+            try:
+                self.__create_migrations_table(conn)
+
+                applied = {
+                    row["version"]: row["checksum"]
+                    for row in conn.execute("SELECT version, checksum FROM schema_migrations;").fetchall()
+                }
+                conn.commit()
+
+                for migration in self.migrations():
+                    checksum = migration.checksum()
+
+                    if migration.version in applied:
+                        if applied[migration.version] != checksum:
+                            _logger.warning(f"Migration {migration.version} changed after being applied")
+
+                        continue
+
+                    _logger.info(f"Applying migration {migration.version} - {migration.name}")
+
+                    with conn.transaction():
+                        conn.execute(migration.read())
+                        conn.execute(
+                            "INSERT INTO schema_migrations (version, name, checksum, applied_at) VALUES (%s, %s, %s, NOW());",
+                            (migration.version, migration.name, checksum),
+                        )
+
+                    executed.append(migration)
+
+            finally:
+                conn.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK,))
+                conn.commit()
+
+        _logger.info(f"{len(executed)} migrations applied")
+
+        return executed
+
+    def __create_migrations_table(self, conn):
+        conn.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {};").format(sql.Identifier(_env.ENVIRONMENT)))
+        conn.execute("""--sql
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version integer PRIMARY KEY,
+            name varchar NOT NULL,
+            checksum varchar NOT NULL,
+            applied_at timestamp NOT NULL DEFAULT NOW()
+        );
+        """)
+        conn.commit()
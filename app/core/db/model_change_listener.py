@@ -0,0 +1,72 @@
+from typing import Callable
+import json
+import random
+import threading
+import time
+import psycopg
+from app.core.db.pg_connection import get_conninfo
+from app.core.configs import get_environment, get_logger
+
+_env = get_environment()
+_logger = get_logger(__name__)
+
+CHANNEL = "model_changes"
+
+
+class ModelChangeListener(threading.Thread):
+    """
+    Listens to the notifications of the models trigger on a dedicated
+    connection and reports the changed model ids of this environment
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[int], None],
+        on_connect: Callable[[], None],
+        on_disconnect: Callable[[], None],
+    ) -> None:
+        super().__init__(name="model-change-listener", daemon=True)
+        self.__on_change = on_change
+        self.__on_connect = on_connect
+        self.__on_disconnect = on_disconnect
+
+    def run(self):
+        attempt = 0
+
+        while True:
+            try:
+                # Keepalives make a silently dropped connection fail instead of waiting forever
+                with psycopg.connect(
+                    get_conninfo(),
+                    autocommit=True,
+                    keepalives=1,
+                    keepalives_idle=30,
+                    keepalives_interval=10,
+                    keepalives_count=3,
+                ) as conn:
+                    conn.execute(f"LISTEN {CHANNEL};")
+                    self.__on_connect()
+                    attempt = 0
+
+                    _logger.info(f"Listening to {CHANNEL}")
+
+                    for notify in conn.notifies():
+                        self.__handle(notify.payload)
+
+            except Exception as error:
+                _logger.warning(f"Model change listener disconnected: {str(error)}")
+
+            self.__on_disconnect()
+
+            time.sleep(random.uniform(0, min(_env.DATABASE_RETRY_MAX_SECONDS, _env.DATABASE_RETRY_BASE_SECONDS * 2 ** attempt)))
+            attempt += 1
+
+    def __handle(self, payload: str):
+        try:
+            change = json.loads(payload)
+
+            if change.get("schema") == _env.ENVIRONMENT:
+                self.__on_change(int(change["id"]))
+
+        except Exception as error:
+            _logger.error(f"Error on model change {payload}: {str(error)}")
@@ -1,21 +1,67 @@
-import psycopg
+from functools import lru_cache
+from psycopg.pq import TransactionStatus
+from psycopg import sql
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 from app.core.configs import get_environment, get_logger
+from app.core.metrics import DB_RETRIES, track_pool
+import psycopg
+import random
 import time
 
 _env = get_environment()
 _logger = get_logger(__name__)
 
+# Errors after which the statement is known not to be committed and can run again on a new connection
+TRANSIENT_ERRORS = (psycopg.OperationalError, psycopg.InterfaceError)
+
+
+def configure_connection(connection: psycopg.Connection):
+    """Route every new pooled connection to the environment schema once"""
+    connection.execute(sql.SQL("SET search_path TO {}").format(sql.Identifier(_env.ENVIRONMENT)))
+    connection.commit()
+
+
+def get_conninfo() -> str:
+    return (
+        f"host={_env.DATABASE_HOST} "
+        f"port={_env.DATABASE_PORT} "
+        f"user={_env.DATABASE_USER} "
+        f"password={_env.DATABASE_PASSWORD} "
+        f"dbname={_env.DATABASE_NAME} "
+    )
+
+
+@lru_cache()
+def get_connection_pool() -> ConnectionPool:
+    """Helper function to get the process connection pool, opened on first use"""
+    return ConnectionPool(
+        conninfo=get_conninfo(),
+        kwargs={"autocommit": False, "row_factory": dict_row},
+        configure=configure_connection,
+        min_size=_env.DATABASE_POOL_MIN_SIZE,
+        max_size=_env.DATABASE_POOL_MAX_SIZE,
+        timeout=_env.DATABASE_POOL_TIMEOUT,
+        max_idle=_env.DATABASE_POOL_MAX_IDLE,
+        check=ConnectionPool.check_connection if _env.DATABASE_POOL_HEALTH_CHECK else None,
+        name="greywolf",
+        open=True,
+    )
+
 
 class PGConnection:
+    """
+    Connection checked out from the process pool on first use and given
+    back on close (or when leaving the with block)
+    """
 
     def __init__(self) -> None:
-        self.__start_connection()
+        self.conn = None
+        self.cursor = None
 
-    def execute(self, sql_statement: str, values: tuple = None):
-        sql = sql_statement.replace("public", _env.ENVIRONMENT)
+    def execute(self, sql_statement: str, values: tuple = None, prepare: bool = None):
         if self.cursor:
-            self.cursor.execute(sql, values)
+            self.cursor.execute(sql_statement, values, prepare=prepare)
 
     def commit(self):
         if self.conn:
@@ -26,60 +72,80 @@ class PGConnection:
 
     def fetch(self, all=False):
         return self.cursor.fetchall() if all else self.cursor.fetchone()
-    
-    def fetch_with_retry(self, sql_statement: str, values: tuple = None, all: bool = False):
-        response = None
 
-        for i in range(10):
+    def fetch_with_retry(self, sql_statement: str, values: tuple = None, all: bool = False, prepare: bool = None):
+        """
+        Execute and fetch, retrying on a new connection only when the
+        connection failed (the statement was not committed), with exponential
+        backoff and jitter. Empty results are returned as they are and any
+        other error is rolled back and raised.
+
+        prepare=True makes hot statements server-side prepared on their first
+        run instead of after psycopg's prepare threshold.
+        """
+        for attempt in range(_env.DATABASE_RETRY_ATTEMPTS):
             try:
                 if not self.conn:
                     self.__start_connection()
 
-                self.execute(sql_statement=sql_statement, values=values)
-                response = self.fetch(all=all)
+                self.execute(sql_statement=sql_statement, values=values, prepare=prepare)
+                return self.fetch(all=all)
 
-                if response:
-                    break
+            except TRANSIENT_ERRORS as error:
+                self.close()
 
-            except Exception as error:
-                if i >= 9:
+                if attempt + 1 >= _env.DATABASE_RETRY_ATTEMPTS:
                     _logger.error(f"Error: {str(error)}")
+                    raise
 
-                _logger.warning(f"DB retry activated - Count: {i}")
-                self.close()
-                self.conn = None
-                time.sleep(2)
+                DB_RETRIES.labels(error=type(error).__name__).inc()
+                _logger.warning(f"DB retry activated - Count: {attempt + 1} - {type(error).__name__}")
+                time.sleep(self.__backoff(attempt))
 
-        return response
+            except Exception:
+                self.__rollback_quietly()
+                raise
 
     def close(self):
+        if not self.conn:
+            return
+
+        try:
+            # Selects leave a transaction open, end it here instead of making the pool warn about it
+            if self.conn.info.transaction_status == TransactionStatus.INTRANS:
+                self.conn.rollback()
+
+        except Exception:
+            ...
+
         try:
-            self.conn.close()
+            get_connection_pool().putconn(self.conn)
 
         except Exception:
             ...
 
+        self.conn = None
+        self.cursor = None
+        track_pool(get_connection_pool().get_stats())
+
     def __start_connection(self):
+        pool = get_connection_pool()
+        self.conn = pool.getconn()
+        self.cursor = self.conn.cursor()
+        track_pool(pool.get_stats())
+
+    def __rollback_quietly(self):
         try:
-            self.conn = psycopg.connect(
-                conninfo=(
-                    f"host={_env.DATABASE_HOST} "
-                    f"port={_env.DATABASE_PORT} "
-                    f"user={_env.DATABASE_USER} "
-                    f"password={_env.DATABASE_PASSWORD} "
-                    f"dbname={_env.DATABASE_NAME} "
-                ),
-                autocommit=False,
-                row_factory=dict_row
-            )
-            self.cursor = self.conn.cursor()
+            self.conn.rollback()
 
         except Exception:
-            self.conn = None
-            self.cursor = None
+            ...
+
+    def __backoff(self, attempt: int) -> float:
+        ceiling = min(_env.DATABASE_RETRY_MAX_SECONDS, _env.DATABASE_RETRY_BASE_SECONDS * 2 ** attempt)
+        return random.uniform(0, ceiling)
 
     def __enter__(self):
-        self.__start_connection()
         return self
 
     def __exit__(self, type, value, traceback):
@@ -1,3 +1,5 @@
 from .model_repository import ModelRepository
 from .property_repository import PropertyRepository
 from .model_history_repository import ModelHistoryRepository
+from .model_progress_repository import ModelProgressRepository
+from .cached_model_repository import CachedModelRepository
@@ -0,0 +1,54 @@
+from typing import List, Tuple
+from app.core.db import DBConnection
+from app.core.db.repositories.model_repository import ModelRepository
+from app.core.cache.model_cache import ModelCache
+from app.core.entities import ModelInDB, ModelStatus, SummarizedModel
+
+
+class CachedModelRepository(ModelRepository):
+    """
+    ModelRepository reading model rows and the latest READY model of each
+    property type through the process ModelCache, invalidated by NOTIFY
+    """
+
+    def __init__(self, connection: DBConnection, cache: ModelCache) -> None:
+        super().__init__(connection)
+        self.__cache = cache
+
+    def select_latest(self, property_type: str = None) -> ModelInDB:
+        return self.__cache.get_latest(
+            property_type, lambda: super(CachedModelRepository, self).select_latest(property_type=property_type)
+        )
+
+    def select_by_id(self, id: int) -> SummarizedModel:
+        return self.__cache.get("summary", id, lambda: super(CachedModelRepository, self).select_by_id(id=id))
+
+    def select_complete_by_id(self, id: int) -> ModelInDB:
+        return self.__cache.get(
+            "complete", id, lambda: super(CachedModelRepository, self).select_complete_by_id(id=id)
+        )
+
+    # The notification reaches this replica a moment later, its own writes are dropped right away
+
+    def update_status(self, new_status: ModelStatus, model_id: int) -> bool:
+        updated = super().update_status(new_status=new_status, model_id=model_id)
+        self.__cache.invalidate(model_id)
+        return updated
+
+    def update(self, model_in_db: ModelInDB) -> bool:
+        updated = super().update(model_in_db=model_in_db)
+        self.__cache.invalidate(model_in_db.id)
+        return updated
+
+    def delete_by_id(self, id: int) -> List[str]:
+        deleted = super().delete_by_id(id=id)
+        self.__cache.invalidate(id)
+        return deleted
+
+    def delete_prunable(self, older_than_days: int, keep_ready: int) -> Tuple[List[int], List[str]]:
+        ids, paths = super().delete_prunable(older_than_days=older_than_days, keep_ready=keep_ready)
+
+        for id in ids:
+            self.__cache.invalidate(id)
+
+        return ids, paths
@@ -1,13 +1,48 @@
 from typing import Dict, List
 from app.core.db import DBConnection
 from app.core.db.repositories.base_repository import Repository
-from app.core.entities import ModelHistory, ModelHistoryInDB
+from app.core.entities import ModelHistory, ModelHistoryArrays, ModelHistoryInDB, ModelHistoryPoint
 from app.core.configs import get_logger
-import json
+import numpy as np
 
 _logger = get_logger(__name__)
 
 
+def history_arrays(results: List[dict]) -> ModelHistoryArrays:
+    """Concatenate the per model aggregates of select_history_arrays"""
+    def column(name: str, dtype) -> np.ndarray:
+        if not results:
+            return np.empty(0, dtype=dtype)
+
+        return np.concatenate([np.asarray(result[name], dtype=dtype) for result in results])
+
+    # Every evaluation of a model has its number of hidden layers, models can differ
+    layers_per_model = [
+        np.asarray(result["hidden_layer_sizes"], dtype=np.int32).reshape(len(result["epoch"]), -1)
+        for result in results
+    ]
+    depth = max((layers.shape[1] for layers in layers_per_model), default=0)
+    hidden_layer_sizes = np.zeros((sum(len(layers) for layers in layers_per_model), depth), dtype=np.int32)
+    row = 0
+
+    for layers in layers_per_model:
+        hidden_layer_sizes[row:row + len(layers), :layers.shape[1]] = layers
+        row += len(layers)
+
+    return ModelHistoryArrays(
+        model_id=np.concatenate(
+            [np.full(len(result["epoch"]), result["model_id"], dtype=np.int64) for result in results]
+        ) if results else np.empty(0, dtype=np.int64),
+        epoch=column("epoch", np.int32),
+        mse=column("mse", np.float64),
+        max_iter=column("max_iter", np.int32),
+        learning_rate=column("learning_rate", np.float64),
+        momentum=column("momentum", np.float64),
+        batch_size=column("batch_size", np.int32),
+        hidden_layer_sizes=hidden_layer_sizes,
+    )
+
+
 class ModelHistoryRepository(Repository):
     def __init__(self, connection: DBConnection) -> None:
         super().__init__(connection)
@@ -15,18 +50,24 @@ class ModelHistoryRepository(Repository):
     def create(self, model_history: ModelHistory) -> ModelHistoryInDB:
         query = """--sql
         INSERT INTO
-            public.model_histories
-            (model_id, epoch, mse, params, created_at, updated_at)
-        VALUES(%(model_id)s, %(epoch)s, %(mse)s, %(params)s, NOW(), NOW())
-        RETURNING id, model_id, epoch, mse, params, created_at, updated_at;
+            model_histories
+            (model_id, epoch, mse, max_iter, learning_rate, momentum, batch_size, hidden_layer_sizes, created_at, updated_at)
+        VALUES(%(model_id)s, %(epoch)s, %(mse)s, %(max_iter)s, %(learning_rate)s, %(momentum)s, %(batch_size)s, %(hidden_layer_sizes)s, NOW(), NOW())
+        RETURNING id, model_id, epoch, mse, created_at, updated_at;
         """
         try:
+            params = model_history.params
+
             result = self.conn.fetch_with_retry(sql_statement=query, values={
                 "model_id": model_history.model_id,
                 "epoch": model_history.epoch,
                 "mse": model_history.mse,
-                "params": json.dumps(model_history.params)
-            })
+                "max_iter": params.get("max_iter"),
+                "learning_rate": params.get("learning_rate"),
+                "momentum": params.get("momentum"),
+                "batch_size": params.get("batch_size"),
+                "hidden_layer_sizes": params.get("hidden_layer_sizes"),
+            }, prepare=True)
             self.conn.commit()
 
             if result:
@@ -35,7 +76,7 @@ class ModelHistoryRepository(Repository):
                     model_id=result["model_id"],
                     epoch=result["epoch"],
                     mse=result["mse"],
-                    params=result["params"],
+                    params=params,
                     created_at=result["created_at"],
                     updated_at=result["updated_at"],
                 )
@@ -50,11 +91,18 @@ class ModelHistoryRepository(Repository):
             mh.model_id,
             mh.epoch,
             mh.mse,
-            mh.params,
+            -- Rows written by a version without the typed columns only have params
+            COALESCE(NULLIF(mh.params::jsonb, '{}'), jsonb_build_object(
+                'max_iter', mh.max_iter,
+                'hidden_layer_sizes', mh.hidden_layer_sizes,
+                'learning_rate', mh.learning_rate,
+                'momentum', mh.momentum,
+                'batch_size', mh.batch_size
+            )) AS params,
             mh.created_at,
             mh.updated_at
         FROM
-            public.model_histories mh
+            model_histories mh
         WHERE
             mh.model_id = ANY(%(models_id)s);
         """
@@ -77,21 +125,98 @@ class ModelHistoryRepository(Repository):
             _logger.error(f"Error: {str(error)}")
             return {}
 
-    def delete_by_model_id(self, model_id: int) -> bool:
+    def select_history_arrays(self, models_id: List[int] = None) -> ModelHistoryArrays:
+        """
+        Histories of the given models (all of them by default) as NumPy
+        columns, aggregated to one row per model so nothing is decoded per
+        evaluation in Python. Rows without the typed columns fall back to
+        their params.
+        """
+        models_filter = "AND mh.model_id = ANY(%(models_id)s)" if models_id is not None else ""
+
+        query = f"""--sql
+        SELECT
+            mh.model_id,
+            array_agg(mh.epoch ORDER BY mh.epoch) AS epoch,
+            array_agg(mh.mse ORDER BY mh.epoch) AS mse,
+            -- Rows written by a version without the typed columns only have params
+            array_agg(
+                COALESCE(mh.max_iter, (mh.params::jsonb ->> 'max_iter')::integer) ORDER BY mh.epoch
+            ) AS max_iter,
+            array_agg(
+                COALESCE(mh.learning_rate, (mh.params::jsonb ->> 'learning_rate')::double precision) ORDER BY mh.epoch
+            ) AS learning_rate,
+            array_agg(
+                COALESCE(mh.momentum, (mh.params::jsonb ->> 'momentum')::double precision) ORDER BY mh.epoch
+            ) AS momentum,
+            array_agg(
+                COALESCE(mh.batch_size, (mh.params::jsonb ->> 'batch_size')::integer) ORDER BY mh.epoch
+            ) AS batch_size,
+            array_agg(
+                COALESCE(mh.hidden_layer_sizes, ARRAY(
+                    SELECT jsonb_array_elements_text(mh.params::jsonb -> 'hidden_layer_sizes')::integer
+                )) ORDER BY mh.epoch
+            ) AS hidden_layer_sizes
+        FROM
+            model_histories mh
+        WHERE
+            (mh.max_iter IS NOT NULL OR mh.params::jsonb ? 'max_iter')
+            {models_filter}
+        GROUP BY
+            mh.model_id
+        ORDER BY
+            mh.model_id;
+        """
+
+        try:
+            results = self.conn.fetch_with_retry(sql_statement=query, values={"models_id": models_id}, all=True)
+
+            return history_arrays(results or [])
+
+        except Exception as error:
+            _logger.error(f"Error on select_history_arrays: {str(error)}")
+            return history_arrays([])
+
+    def select_best_per_epoch(self, models_id: List[int]) -> Dict[int, List[ModelHistoryPoint]]:
+        """
+        History downsampled to the best mse found so far at each GWO epoch,
+        history rows are grouped in epochs of population_size evaluations
+        """
         query = """--sql
-        DELETE
+        SELECT
+            mh.model_id,
+            (mh.epoch - 1) / m.population_size AS gwo_epoch,
+            MIN(MIN(mh.mse)) OVER (
+                PARTITION BY mh.model_id
+                ORDER BY (mh.epoch - 1) / m.population_size
+            ) AS mse
         FROM
-            public.model_histories mh
+            model_histories mh
+        INNER JOIN models m ON
+            m.id = mh.model_id
         WHERE
-            mh.model_id = %(model_id)s
-        RETURNING 1;
+            mh.model_id = ANY(%(models_id)s)
+        GROUP BY
+            mh.model_id,
+            gwo_epoch
+        ORDER BY
+            mh.model_id,
+            gwo_epoch;
         """
 
         try:
-            result = self.conn.fetch_with_retry(sql_statement=query, values={"model_id": model_id})
-            self.conn.commit()
-            return bool(result)
+            models = {}
+
+            results = self.conn.fetch_with_retry(sql_statement=query, values={"models_id": models_id}, all=True, prepare=True)
+
+            if results:
+                for result in results:
+                    models.setdefault(result["model_id"], []).append(
+                        ModelHistoryPoint(epoch=result["gwo_epoch"], mse=result["mse"])
+                    )
+
+            return models
 
         except Exception as error:
-            _logger.error(f"Error on delete history: {str(error)}")
-            return False
+            _logger.error(f"Error on select_best_per_epoch: {str(error)}")
+            return {}
@@ -0,0 +1,88 @@
+from app.core.db import DBConnection
+from app.core.db.repositories.base_repository import Repository
+from app.core.entities import ModelProgress
+from app.core.configs import get_logger
+
+_logger = get_logger(__name__)
+
+
+class ModelProgressRepository(Repository):
+    def __init__(self, connection: DBConnection) -> None:
+        super().__init__(connection)
+
+    def start(self, model_id: int, total: int) -> bool:
+        query = """--sql
+        INSERT INTO
+            model_progress
+            (model_id, completed, total, ewma_seconds, updated_at)
+        VALUES(%(model_id)s, 0, %(total)s, 0, NOW())
+        ON CONFLICT (model_id) DO UPDATE SET
+            completed = 0,
+            total = EXCLUDED.total,
+            ewma_seconds = 0,
+            updated_at = NOW()
+        RETURNING model_id;
+        """
+        try:
+            result = self.conn.fetch_with_retry(sql_statement=query, values={
+                "model_id": model_id,
+                "total": total,
+            })
+            self.conn.commit()
+
+            return bool(result)
+
+        except Exception as error:
+            _logger.error(f"Error on start progress: {str(error)}")
+            return False
+
+    def record_evaluation(self, model_id: int, duration_seconds: float, alpha: float) -> bool:
+        query = """--sql
+        UPDATE
+            model_progress
+        SET
+            completed = completed + 1,
+            ewma_seconds = CASE
+                WHEN completed = 0 THEN %(duration_seconds)s
+                ELSE %(alpha)s * %(duration_seconds)s + (1 - %(alpha)s) * ewma_seconds
+            END,
+            updated_at = NOW()
+        WHERE
+            model_id = %(model_id)s
+        RETURNING model_id;
+        """
+        try:
+            result = self.conn.fetch_with_retry(sql_statement=query, values={
+                "model_id": model_id,
+                "duration_seconds": duration_seconds,
+                "alpha": alpha,
+            }, prepare=True)
+            self.conn.commit()
+
+            return bool(result)
+
+        except Exception as error:
+            _logger.error(f"Error on record evaluation: {str(error)}")
+            return False
+
+    def select_by_model_id(self, model_id: int) -> ModelProgress:
+        query = """--sql
+        SELECT
+            model_id,
+            completed,
+            total,
+            ewma_seconds,
+            updated_at
+        FROM
+            model_progress mp
+        WHERE
+            mp.model_id = %(model_id)s;
+        """
+        try:
+            result = self.conn.fetch_with_retry(sql_statement=query, values={"model_id": model_id}, prepare=True)
+
+            if result:
+                return ModelProgress(**result)
+
+        except Exception as error:
+            _logger.error(f"Error on select progress: {str(error)}")
@@ -1,13 +1,28 @@
 import json
-import numpy as np
-from typing import List
+from datetime import datetime
+from typing import List, Tuple
 from app.core.db import DBConnection
 from app.core.db.repositories.base_repository import Repository
-from app.core.entities import Model, ModelInDB, ModelStatus, SummarizedModel
+from app.core.entities import Model, ModelInDB, ModelStatus, ModelWithHistory, SummarizedModel
 from app.core.configs import get_logger
 
 _logger = get_logger(__name__)
 
+# Every column holding the bucket path of a model artifact
+ARTIFACT_COLUMNS = (
+    "path",
+    "x_min_max_scaler",
+    "y_min_max_scaler",
+    "neighborhood_encoder",
+    "one_hot_encoder",
+    "preprocessing_pipeline",
+    "preprocessing_state",
+)
+
+
+def artifact_paths(results: List[dict]) -> List[str]:
+    return [result[column] for result in results for column in ARTIFACT_COLUMNS if result.get(column)]
+
 
 class ModelRepository(Repository):
     def __init__(self, connection: DBConnection) -> None:
@@ -17,10 +32,10 @@ class ModelRepository(Repository):
         query = """--sql
         INSERT
             INTO
-            public.models
-        ("path", created_at, updated_at, x_min_max_scaler, y_min_max_scaler, neighborhood_encoder, one_hot_encoder, mse, name, status, gwo_params, epochs, population_size)
-        VALUES(%(path)s, NOW(), NOW(), %(x_min_max_scaler)s, %(y_min_max_scaler)s, %(neighborhood_encoder)s, %(one_hot_encoder)s, %(mse)s, %(name)s, %(status)s, %(gwo_params)s, %(epochs)s, %(population_size)s)
-        RETURNING id, "path", x_min_max_scaler, y_min_max_scaler, neighborhood_encoder, one_hot_encoder, mse, created_at, updated_at, name, status, gwo_params, epochs, population_size;
+            models
+        ("path", created_at, updated_at, x_min_max_scaler, y_min_max_scaler, neighborhood_encoder, one_hot_encoder, preprocessing_pipeline, preprocessing_state, mse, name, status, gwo_params, epochs, population_size)
+        VALUES(%(path)s, NOW(), NOW(), %(x_min_max_scaler)s, %(y_min_max_scaler)s, %(neighborhood_encoder)s, %(one_hot_encoder)s, %(preprocessing_pipeline)s, %(preprocessing_state)s, %(mse)s, %(name)s, %(status)s, %(gwo_params)s, %(epochs)s, %(population_size)s)
+        RETURNING id, "path", x_min_max_scaler AS x_min_max, y_min_max_scaler AS y_min_max, neighborhood_encoder, one_hot_encoder, preprocessing_pipeline, preprocessing_state, dataset_snapshot, mse, created_at, updated_at, name, status, gwo_params, epochs, population_size;
         """
         try:
             result = self.conn.fetch_with_retry(sql_statement=query, values={
@@ -29,6 +44,8 @@ class ModelRepository(Repository):
                 "y_min_max_scaler": model.y_min_max,
                 "neighborhood_encoder": model.neighborhood_encoder,
                 "one_hot_encoder": model.one_hot_encoder,
+                "preprocessing_pipeline": model.preprocessing_pipeline,
+                "preprocessing_state": model.preprocessing_state,
                 "mse": model.mse,
                 "name": model.name,
                 "status": model.status,
@@ -47,7 +64,7 @@ class ModelRepository(Repository):
     def update_status(self, new_status: ModelStatus, model_id: int) -> bool:
         query = """--sql
         UPDATE
-            public.models
+            models
         SET
             updated_at = NOW(),
             status = %(new_status)s
@@ -59,7 +76,7 @@ class ModelRepository(Repository):
             result = self.conn.fetch_with_retry(sql_statement=query, values={
                 "new_status": new_status,
                 "model_id": model_id
-            })
+            }, prepare=True)
             self.conn.commit()
 
             return bool(result)
@@ -70,13 +87,16 @@ class ModelRepository(Repository):
     def update(self, model_in_db: ModelInDB) -> bool:
         query = """--sql
         UPDATE
-            public.models
+            models
         SET
             "path" = %(path)s,
             updated_at = NOW(),
             x_min_max_scaler = %(x_min_max_scaler)s,
             neighborhood_encoder = %(neighborhood_encoder)s,
             one_hot_encoder = %(one_hot_encoder)s,
+            preprocessing_pipeline = %(preprocessing_pipeline)s,
+            preprocessing_state = %(preprocessing_state)s,
+            dataset_snapshot = %(dataset_snapshot)s,
             mse = %(mse)s,
             y_min_max_scaler = %(y_min_max_scaler)s,
             gwo_params = %(gwo_params)s
@@ -91,6 +111,9 @@ class ModelRepository(Repository):
                 "y_min_max_scaler": model_in_db.y_min_max,
                 "neighborhood_encoder": model_in_db.neighborhood_encoder,
                 "one_hot_encoder": model_in_db.one_hot_encoder,
+                "preprocessing_pipeline": model_in_db.preprocessing_pipeline,
+                "preprocessing_state": model_in_db.preprocessing_state,
+                "dataset_snapshot": model_in_db.dataset_snapshot,
                 "mse": model_in_db.mse,
                 "id": model_in_db.id,
                 "gwo_params": json.dumps(model_in_db.gwo_params)
@@ -102,8 +125,11 @@ class ModelRepository(Repository):
         except Exception as error:
             _logger.error(f"Error: {str(error)}")
 
-    def select_latest(self) -> ModelInDB:
-        query = """--sql
+    def select_latest(self, property_type: str = None) -> ModelInDB:
+        """Latest READY model, of the property type when it is given"""
+        property_type_filter = "AND m.gwo_params ->> 'property_type' = %(property_type)s" if property_type else ""
+
+        query = f"""--sql
         SELECT
             id,
             "path",
@@ -111,6 +137,9 @@ class ModelRepository(Repository):
             y_min_max_scaler AS y_min_max,
             neighborhood_encoder,
             one_hot_encoder,
+            preprocessing_pipeline,
+            preprocessing_state,
+            dataset_snapshot,
             mse,
             created_at,
             updated_at,
@@ -120,15 +149,18 @@ class ModelRepository(Repository):
             epochs,
             population_size
         FROM
-            public.models m
+            models m
         WHERE
             m.status = 'READY'
+            {property_type_filter}
         ORDER BY
             created_at DESC
         LIMIT 1 OFFSET 0;
         """
         try:
-            result = self.conn.fetch_with_retry(sql_statement=query)
+            result = self.conn.fetch_with_retry(
+                sql_statement=query, values={"property_type": property_type}, prepare=True
+            )
 
             if result:
                 return ModelInDB(**result)
@@ -136,39 +168,72 @@ class ModelRepository(Repository):
         except Exception as error:
             _logger.error(f"Error: {str(error)}")
 
-    def select_models(self, page: int, page_size: int) -> List[ModelInDB]:
-        query = """
+    def select_latest_preprocessing_state(self, property_type: str = None) -> str:
+        query = """--sql
+        SELECT
+            preprocessing_state
+        FROM
+            models m
+        WHERE
+            m.status = 'READY'
+            AND m.preprocessing_state <> ''
+            AND m.gwo_params ->> 'property_type' IS NOT DISTINCT FROM %(property_type)s
+        ORDER BY
+            created_at DESC
+        LIMIT 1 OFFSET 0;
+        """
+        try:
+            result = self.conn.fetch_with_retry(sql_statement=query, values={"property_type": property_type})
+
+            if result:
+                return result["preprocessing_state"]
+
+        except Exception as error:
+            _logger.error(f"Error on select_latest_preprocessing_state: {str(error)}")
+
+    def select_models(self, limit: int, offset: int = 0, after: Tuple[datetime, int] = None) -> List[ModelWithHistory]:
+        """
+        READY models newest first, starting after the (created_at, id) of the
+        last listed model when after is set and at offset otherwise
+        """
+        keyset = "AND (m.created_at, m.id) < (%(after_created_at)s, %(after_id)s)" if after else ""
+
+        query = f"""--sql
         SELECT
             id,
-            "path",
-            x_min_max_scaler AS x_min_max,
-            y_min_max_scaler AS y_min_max,
-            neighborhood_encoder,
-            one_hot_encoder,
-            mse,
-            created_at,
-            updated_at,
             name,
+            mse,
             status,
             gwo_params,
-            epochs,
-            population_size
+            created_at,
+            updated_at
         FROM
-            public.models m
-        WHERE m.status = 'READY' and m.mse > 0
+            models m
+        WHERE
+            m.status = 'READY'
+            AND m.mse > 0
+            {keyset}
         ORDER BY
-            created_at DESC
-        LIMIT %(page_size)s OFFSET %(page)s;
+            created_at DESC,
+            id DESC
+        LIMIT %(limit)s OFFSET %(offset)s;
         """
         try:
             models = []
 
-            results = self.conn.fetch_with_retry(sql_statement=query, values={"page": page - 1, "page_size": page_size}, all=True)
+            after_created_at, after_id = after if after else (None, None)
+
+            results = self.conn.fetch_with_retry(sql_statement=query, values={
+                "after_created_at": after_created_at,
+                "after_id": after_id,
+                "limit": limit,
+                "offset": 0 if after else offset,
+            }, all=True, prepare=True)
 
             if results:
                 for result in results:
-                    models.append(ModelInDB(**result))
-     
+                    models.append(ModelWithHistory(**result))
+
             return models
 
         except Exception as error:
@@ -184,12 +249,12 @@ class ModelRepository(Repository):
             created_at,
             updated_at
         FROM
-            public.models m
+            models m
         WHERE
             m.id = %(id)s;
         """
         try:
-            result = self.conn.fetch_with_retry(sql_statement=query, values={"id": id})
+            result = self.conn.fetch_with_retry(sql_statement=query, values={"id": id}, prepare=True)
 
             if result:
                 return SummarizedModel(**result)
@@ -206,6 +271,9 @@ class ModelRepository(Repository):
             y_min_max_scaler AS y_min_max,
             neighborhood_encoder,
             one_hot_encoder,
+            preprocessing_pipeline,
+            preprocessing_state,
+            dataset_snapshot,
             mse,
             created_at,
             updated_at,
@@ -215,7 +283,7 @@ class ModelRepository(Repository):
             epochs,
             population_size
         FROM
-            public.models m
+            models m
         WHERE
             m.status = 'READY' AND m.id = %(model_id)s
         ORDER BY
@@ -223,7 +291,7 @@ class ModelRepository(Repository):
         LIMIT 1 OFFSET 0;
         """
         try:
-            result = self.conn.fetch_with_retry(sql_statement=query, values={"model_id": id})
+            result = self.conn.fetch_with_retry(sql_statement=query, values={"model_id": id}, prepare=True)
 
             if result:
                 return ModelInDB(**result)
@@ -231,77 +299,23 @@ class ModelRepository(Repository):
         except Exception as error:
             _logger.error(f"Error on select_complete_by_id: {str(error)}")
 
-    def select_remaining_time(self, model_id: int) -> float:
-        query = """--sql
-        WITH TimeDiffCTE AS (
-            SELECT
-                m.id,
-                m.gwo_params,
-                m.population_size,
-                m.epochs,
-                mh.epoch AS mh_epoch,
-                mh.created_at,
-                LAG(mh.created_at) OVER (PARTITION BY m.id ORDER BY mh.epoch) AS prev_created_at
-            FROM
-                public.models m
-            INNER JOIN public.model_histories mh ON
-                m.id = mh.model_id
-            WHERE m.id = %(model_id)s
-        )
-        SELECT
-            id,
-            gwo_params,
-            population_size,
-            epochs,
-            mh_epoch,
-            created_at,
-            COALESCE(AVG(EXTRACT(EPOCH FROM (created_at - prev_created_at))), 0) AS avg_time_diff
-        FROM
-            TimeDiffCTE
-        GROUP BY
-            id, gwo_params, population_size, epochs, mh_epoch, created_at
-        ORDER BY
-            mh_epoch;
+    def select_model_statistics(self, window_days: int) -> dict:
+        """
+        Models created in the last window_days days by status, read from the
+        per day counters kept by the models trigger
         """
-        try:
-            results = self.conn.fetch_with_retry(sql_statement=query, values={"model_id": model_id}, all=True)
-
-            times = []
-
-            if not results:
-                return 0
-            
-            last_epoch = results[-1]["mh_epoch"]
-
-            epochs = results[0]["epochs"] + 1
-            population_size = results[0]["population_size"]
-
-            for result in results:
-                times.append(result["avg_time_diff"])
-
-            mean_time = np.mean(times)
-
-            total_epochs = (epochs * population_size) + 1
-            atual_epochs = total_epochs - last_epoch
-
-            return round((atual_epochs * mean_time), 2)
-
-        except Exception as error:
-            _logger.error(f"Error: {str(error)}")
-
-    def select_model_statistics(self) -> dict:
         query = """--sql
         SELECT
-            m.status,
-            count(m.id)
+            msd.status,
+            SUM(msd.count) AS count
         FROM
-            public.models m
-        WHERE m.created_at >= CURRENT_DATE - INTERVAL '2 days'
-        GROUP BY m.status;
+            model_status_daily msd
+        WHERE msd.day >= CURRENT_DATE - %(window_days)s::integer
+        GROUP BY msd.status;
         """
 
         try:
-            results = self.conn.fetch_with_retry(sql_statement=query, values={}, all=True)
+            results = self.conn.fetch_with_retry(sql_statement=query, values={"window_days": window_days}, all=True, prepare=True)
 
             status = {
                 "Agendado": 0,
@@ -328,21 +342,90 @@ class ModelRepository(Repository):
             _logger.error(f"Error on select_model_statistics: {str(error)}")
             return {}
 
-    def delete_by_id(self, id: int) -> bool:
-        query = """--sql
+    def delete_by_id(self, id: int) -> List[str]:
+        """
+        Delete the model, its history and progress (ON DELETE CASCADE) in one
+        statement and return the bucket paths of its artifacts, None when the
+        model does not exist
+        """
+        artifact_columns = ", ".join(f'm."{column}"' for column in ARTIFACT_COLUMNS)
+
+        query = f"""--sql
         DELETE
         FROM
-            public.models m
+            models m
         WHERE
             m.id = %(id)s
-        RETURNING 1;
+        RETURNING {artifact_columns};
         """
 
         try:
             result = self.conn.fetch_with_retry(sql_statement=query, values={"id": id})
             self.conn.commit()
-            return bool(result)
+
+            if result:
+                return artifact_paths([result])
 
         except Exception as error:
             _logger.error(f"Error on delete model: {str(error)}")
-            return False
+
+    def delete_prunable(self, older_than_days: int, keep_ready: int) -> Tuple[List[int], List[str]]:
+        """
+        Delete the ERROR models and the READY models superseded by keep_ready
+        newer ones of the same property type, created more than older_than_days
+        ago. Return the deleted ids and the bucket paths of their artifacts.
+        """
+        artifact_columns = ", ".join(f'm."{column}"' for column in ARTIFACT_COLUMNS)
+
+        query = f"""--sql
+        DELETE
+        FROM
+            models m
+        USING (
+            SELECT
+                id
+            FROM
+                models
+            WHERE
+                status = 'ERROR'
+                AND created_at < NOW() - make_interval(days => %(older_than_days)s::integer)
+            UNION
+            SELECT
+                id
+            FROM (
+                SELECT
+                    id,
+                    created_at,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY gwo_params ->> 'property_type'
+                        ORDER BY created_at DESC, id DESC
+                    ) AS position
+                FROM
+                    models
+                WHERE
+                    status = 'READY'
+            ) ready
+            WHERE
+                ready.position > %(keep_ready)s
+                AND ready.created_at < NOW() - make_interval(days => %(older_than_days)s::integer)
+        ) prunable
+        WHERE
+            m.id = prunable.id
+        RETURNING m.id, {artifact_columns};
+        """
+
+        try:
+            results = self.conn.fetch_with_retry(sql_statement=query, values={
+                "older_than_days": older_than_days,
+                "keep_ready": keep_ready,
+            }, all=True)
+            self.conn.commit()
+
+            if results:
+                return [result["id"] for result in results], artifact_paths(results)
+
+            return [], []
+
+        except Exception as error:
+            _logger.error(f"Error on delete_prunable: {str(error)}")
+            return [], []
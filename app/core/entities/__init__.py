@@ -1,3 +1,5 @@
 from .property import Property, PredictedProperty, PropertyType
-from .model_histories import ModelHistory, ModelHistoryInDB
+from .model_histories import ModelHistory, ModelHistoryArrays, ModelHistoryInDB, ModelHistoryPoint
 from .models import Model, ModelInDB, ModelStatus, ModelWithHistory, SummarizedModel
+from .price_sweep import PriceSweep, PriceSurface, SweepAttribute, SweepDimension
+from .model_progress import ModelProgress
@@ -1,5 +1,7 @@
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
 from datetime import datetime
+import numpy as np
 
 
 class ModelHistory(BaseModel):
@@ -13,3 +15,29 @@ class ModelHistoryInDB(ModelHistory):
     id: int = Field(example=123)
     created_at: datetime = Field(example=str(datetime.now()))
     updated_at: datetime = Field(example=str(datetime.now()))
+
+
+class ModelHistoryPoint(BaseModel):
+    epoch: int = Field(example=1)
+    mse: float = Field(example=123)
+
+
+@dataclass
+class ModelHistoryArrays:
+    """
+    Histories of many models as aligned columns, one position per evaluation.
+    hidden_layer_sizes has one row per evaluation padded with 0 up to the
+    deepest network.
+    """
+
+    model_id: np.ndarray
+    epoch: np.ndarray
+    mse: np.ndarray
+    max_iter: np.ndarray
+    learning_rate: np.ndarray
+    momentum: np.ndarray
+    batch_size: np.ndarray
+    hidden_layer_sizes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.epoch)
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class ModelProgress(BaseModel):
+    model_id: int = Field(example=123)
+    completed: int = Field(default=0, example=40)
+    total: int = Field(default=0, example=110)
+    ewma_seconds: float = Field(default=0, example=12.5)
+    updated_at: datetime = Field(example=str(datetime.now()))
+
+    @property
+    def remaining_time_in_seconds(self) -> float:
+        return round(max(self.total - self.completed, 0) * self.ewma_seconds, 2)
@@ -2,7 +2,7 @@ from typing import List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
 from enum import Enum
-from .model_histories import ModelHistoryInDB
+from .model_histories import ModelHistoryPoint
 
 class ModelStatus(str, Enum):
     SCHEDULED: str = "SCHEDULED"
@@ -21,6 +21,9 @@ class Model(BaseModel):
     one_hot_encoder: str = Field(default="", example="path")
     x_min_max: str = Field(default="", example="path")
     y_min_max: str = Field(default="", example="path")
+    preprocessing_pipeline: str = Field(default="", example="path")
+    dataset_snapshot: str = Field(default="", example="sha256")
+    preprocessing_state: str = Field(default="", example="path")
     mse: float = Field(default=0, example=123)
     gwo_params: Optional[dict] = Field(default={})
 
@@ -39,7 +42,7 @@ class ModelWithHistory(BaseModel):
     gwo_params: Optional[dict] = Field(default={})
     created_at: datetime = Field(example=str(datetime.now()))
     updated_at: datetime = Field(example=str(datetime.now()))
-    history: List[ModelHistoryInDB] = Field(default=[])
+    history: List[ModelHistoryPoint] = Field(default=[])
 
 
 class SummarizedModel(BaseModel):
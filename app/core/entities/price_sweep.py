@@ -0,0 +1,68 @@
+from typing import List, Optional, Union
+from enum import Enum
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+from .property import Property
+
+
+class SweepAttribute(str, Enum):
+    ROOMS = "rooms"
+    BATHROOMS = "bathrooms"
+    PARKING_SPACE = "parking_space"
+    SIZE = "size"
+    NEIGHBORHOOD_NAME = "neighborhood_name"
+    FLOOD_QUOTA = "flood_quota"
+
+
+class SweepDimension(BaseModel):
+    attribute: SweepAttribute = Field(example=SweepAttribute.SIZE)
+    values: Optional[List[Union[float, str]]] = Field(default=None, example=None)
+    start: Optional[float] = Field(default=None, example=50)
+    stop: Optional[float] = Field(default=None, example=300)
+    step: Optional[float] = Field(default=None, example=10, gt=0)
+
+    @model_validator(mode="after")
+    def check_range(self) -> "SweepDimension":
+        if self.values is None and None in (self.start, self.stop, self.step):
+            raise ValueError("Inform values or start, stop and step")
+
+        if self.values is None and self.attribute == SweepAttribute.NEIGHBORHOOD_NAME:
+            raise ValueError("neighborhood_name only accepts values")
+
+        if self.values is not None and self.attribute != SweepAttribute.NEIGHBORHOOD_NAME:
+            if any(isinstance(value, str) for value in self.values):
+                raise ValueError(f"{self.attribute.value} only accepts numeric values")
+
+        if self.values is None and self.stop < self.start:
+            raise ValueError("stop must be greater than or equal to start")
+
+        return self
+
+    def grid_values(self) -> list:
+        if self.values is not None:
+            return list(self.values)
+
+        # The stop is included when it is reached by the step
+        return np.arange(self.start, self.stop + self.step / 2, self.step).tolist()
+
+
+class PriceSweep(BaseModel):
+    property: Property
+    dimensions: List[SweepDimension] = Field(min_length=1, max_length=2)
+
+    @model_validator(mode="after")
+    def check_dimensions(self) -> "PriceSweep":
+        attributes = [dimension.attribute for dimension in self.dimensions]
+
+        if len(set(attributes)) != len(attributes):
+            raise ValueError("Each attribute can only be swept once")
+
+        return self
+
+
+class PriceSurface(BaseModel):
+    property: Property
+    dimensions: List[SweepAttribute] = Field(example=[SweepAttribute.SIZE])
+    axes: List[List[Union[float, str]]] = Field(example=[[50, 60, 70]])
+    predicted_prices: list = Field(example=[250000.0, 280000.0, 310000.0])
+    mse: float = Field(example=123)
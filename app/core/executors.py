@@ -0,0 +1,28 @@
+"""
+Executors Module
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from app.core.configs import get_environment
+
+_env = get_environment()
+
+
+@lru_cache()
+def get_io_executor() -> ThreadPoolExecutor:
+    """Helper function to get the bounded executor for blocking I/O (database, bucket)"""
+    return ThreadPoolExecutor(max_workers=_env.IO_WORKERS, thread_name_prefix="io")
+
+
+@lru_cache()
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Helper function to get the bounded executor for CPU-bound inference"""
+    return ThreadPoolExecutor(max_workers=_env.INFERENCE_WORKERS, thread_name_prefix="inference")
+
+
+async def run_in_executor(executor: ThreadPoolExecutor, function, *args, **kwargs):
+    """Run a blocking function in the given executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(function, *args, **kwargs))
@@ -0,0 +1,96 @@
+"""
+Metrics Module
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PREDICTION_SECONDS = Histogram(
+    "greywolf_prediction_seconds",
+    "End to end latency of price predictions",
+    buckets=LATENCY_BUCKETS,
+)
+
+PREDICTION_STAGE_SECONDS = Histogram(
+    "greywolf_prediction_stage_seconds",
+    "Latency of each stage of price predictions",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+PREDICTIONS_IN_FLIGHT = Gauge(
+    "greywolf_predictions_in_flight",
+    "Price predictions currently being processed",
+    multiprocess_mode="livesum",
+)
+
+PREDICTION_BATCH_SIZE = Histogram(
+    "greywolf_prediction_batch_size",
+    "Rows per batched inference",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+
+CACHE_REQUESTS = Counter(
+    "greywolf_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "greywolf_db_pool_connections",
+    "Database connection pool state (size, available, waiting requests, max)",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+DB_RETRIES = Counter(
+    "greywolf_db_retries_total",
+    "Database statements retried after a transient connection error",
+    ["error"],
+)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Observe the time spent in a prediction stage"""
+    start = time.perf_counter()
+    try:
+        yield
+
+    finally:
+        PREDICTION_STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def track_cache(cache: str, hit: bool):
+    """Count a cache lookup"""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def track_pool(stats: dict):
+    """Publish the stats of a psycopg connection pool"""
+    DB_POOL_CONNECTIONS.labels(state="size").set(stats.get("pool_size", 0))
+    DB_POOL_CONNECTIONS.labels(state="available").set(stats.get("pool_available", 0))
+    DB_POOL_CONNECTIONS.labels(state="waiting").set(stats.get("requests_waiting", 0))
+    DB_POOL_CONNECTIONS.labels(state="max").set(stats.get("pool_max", 0))
+
+
+def export_metrics() -> bytes:
+    """Render all metrics in the Prometheus text format"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+
+    return generate_latest(REGISTRY)
@@ -2,3 +2,6 @@ from .model_services import ModelServices
 from .train_services import TrainServices
 from .prediction_services import PredictionServices
 from .preprocessing_services import PreProcessingServices
+from .prediction_batcher import PredictionBatcher
+from .bulk_prediction_services import BulkPredictionServices
+from .sweep_services import SweepServices
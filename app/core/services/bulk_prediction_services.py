@@ -0,0 +1,235 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from typing import AsyncIterator, List, Tuple
+import numpy as np
+import pandas as pd
+from app.core.services.prediction_batcher import PredictionBatcher
+from app.core.services.preprocessing_services import PreProcessingServices, PROPERTY_FEATURES
+from app.core.entities import ModelInDB
+from app.core.configs import get_environment, get_logger
+from app.core.executors import get_inference_executor, run_in_executor
+
+_env = get_environment()
+_logger = get_logger(__name__)
+
+CSV_DELIMITER = ";"
+CSV_QUOTECHAR = "|"
+
+
+class RecordSplitter:
+    """
+    Queues decoded text as records: lines, except that a line break inside a
+    quoted field does not end the record (quotechar=None splits on every
+    line). Iterating it hands the queued records to a csv.reader.
+    """
+
+    def __init__(self, quotechar: str = None) -> None:
+        self.__quotechar = quotechar
+        self.__partial = ""
+        self.__pending = deque()
+
+    def feed(self, text: str, final: bool = False) -> int:
+        """Queue the records completed by text and return how many there are"""
+        self.__partial += text
+        count = 0
+        start = 0
+
+        # Escaped quotes are doubled, so a record is complete when its quote count is even
+        while True:
+            end = self.__partial.find("\n", start)
+
+            if end < 0:
+                break
+
+            start = end + 1
+
+            if self.__quotechar and self.__partial.count(self.__quotechar, 0, start) % 2:
+                continue
+
+            self.__pending.append(self.__partial[:start])
+            self.__partial = self.__partial[start:]
+            start = 0
+            count += 1
+
+        if final and self.__partial:
+            self.__pending.append(self.__partial)
+            self.__partial = ""
+            count += 1
+
+        return count
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.__pending:
+            raise StopIteration
+
+        return self.__pending.popleft()
+
+
+class BulkPredictionServices:
+    """
+    Prices a streamed CSV (export format) or NDJSON upload in fixed-size chunks,
+    yielding priced rows as soon as each chunk is predicted
+    """
+
+    def __init__(
+        self,
+        model_in_db: ModelInDB,
+        preprocessing: PreProcessingServices,
+        ndjson: bool = False,
+        chunk_size: int = None,
+    ) -> None:
+        self.__model_in_db = model_in_db
+        self.__preprocessing = preprocessing
+        self.__ndjson = ndjson
+        self.__chunk_size = chunk_size or _env.BULK_PREDICTION_CHUNK_SIZE
+        self.__header: List[str] = None
+
+    async def predict(self, stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        rows, errors = [], []
+
+        async for row, error in self.__iter_rows(stream):
+            if row is None and error is None:
+                yield self.__format_header()
+                continue
+
+            rows.append(row)
+            errors.append(error)
+
+            if len(rows) >= self.__chunk_size:
+                yield await self.__predict_chunk(rows, errors)
+                rows, errors = [], []
+
+        if rows:
+            yield await self.__predict_chunk(rows, errors)
+
+    async def __iter_rows(self, stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[dict, str]]:
+        """
+        Yield (row, None) for every parsed row and (row, error) for the ones
+        that could not be parsed, so they are answered instead of cutting the
+        response. The CSV header comes as (None, None).
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        records = RecordSplitter(quotechar=None if self.__ndjson else CSV_QUOTECHAR)
+        reader = csv.reader(records, delimiter=CSV_DELIMITER, quotechar=CSV_QUOTECHAR)
+
+        async for chunk in stream:
+            for _ in range(records.feed(decoder.decode(chunk))):
+                row = self.__parse_record(records, reader)
+
+                if row is not None:
+                    yield row
+
+        for _ in range(records.feed(decoder.decode(b"", final=True), final=True)):
+            row = self.__parse_record(records, reader)
+
+            if row is not None:
+                yield row
+
+    def __parse_record(self, records: RecordSplitter, reader) -> Tuple[dict, str]:
+        if self.__ndjson:
+            line = next(records).strip()
+
+            if not line:
+                return None
+
+            try:
+                row = json.loads(line)
+
+            except ValueError:
+                return {"line": line}, "Invalid JSON"
+
+            if not isinstance(row, dict):
+                return {"line": line}, "Each line must be a JSON object"
+
+            return row, None
+
+        try:
+            # The reader consumes exactly the queued record, quoted fields may span lines
+            values = next(reader)
+
+        except csv.Error as error:
+            return {}, f"Invalid CSV row: {str(error)}"
+
+        if not values:
+            return None
+
+        if self.__header is None:
+            self.__header = values
+            return None, None
+
+        return dict(zip(self.__header, values)), None
+
+    async def __predict_chunk(self, rows: List[dict], errors: List[str]) -> str:
+        parsed = np.array([error is None for error in errors])
+
+        # Building and encoding the frame is CPU-bound, keep it off the event loop as well
+        valid, normalized_properties = await run_in_executor(
+            get_inference_executor(), self.__normalize_chunk, rows=[row if ok else {} for row, ok in zip(rows, parsed)]
+        )
+
+        prices = np.full(len(rows), np.nan)
+
+        if valid.any():
+            # The batcher shares the loaded model and its inference lock with the other endpoints
+            predictions = await PredictionBatcher.get_batcher(bucket_path=self.__model_in_db.path).predict_batch(
+                normalized_properties=normalized_properties
+            )
+
+            prices[valid] = self.__preprocessing.desnormalize_prices(predictions)
+
+        _logger.debug(f"Bulk chunk of {len(rows)} rows priced with model #{self.__model_in_db.id}")
+
+        return self.__format_rows(rows, errors, prices)
+
+    def __normalize_chunk(self, rows: List[dict]) -> Tuple[np.array, np.array]:
+        dataframe = pd.DataFrame.from_records(rows)
+
+        properties = pd.DataFrame(index=dataframe.index)
+
+        for column in PROPERTY_FEATURES:
+            values = dataframe[column] if column in dataframe else pd.Series(np.nan, index=dataframe.index)
+            properties[column] = values if column == "neighborhood_name" else pd.to_numeric(values, errors="coerce")
+
+        valid = properties.drop(columns=["flood_quota"]).notna().all(axis=1)
+        valid &= self.__preprocessing.known_neighborhoods(properties["neighborhood_name"])
+
+        if not valid.any():
+            return valid.to_numpy(), None
+
+        return valid.to_numpy(), self.__preprocessing.normalize_properties(properties[valid])
+
+    def __format_header(self) -> str:
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter=CSV_DELIMITER, quotechar=CSV_QUOTECHAR, lineterminator="\n")
+        writer.writerow(self.__header + ["predicted_price"])
+        return output.getvalue()
+
+    def __format_rows(self, rows: List[dict], errors: List[str], prices: np.array) -> str:
+        if self.__ndjson:
+            lines = []
+
+            for row, error, price in zip(rows, errors, prices):
+                if np.isnan(price):
+                    row["predicted_price"] = None
+                    row["error"] = error or "Invalid property or unknown neighborhood"
+
+                else:
+                    row["predicted_price"] = float(price)
+
+                lines.append(json.dumps(row, default=str))
+
+            return "\n".join(lines) + "\n"
+
+        output = io.StringIO()
+        writer = csv.writer(output, delimiter=CSV_DELIMITER, quotechar=CSV_QUOTECHAR, lineterminator="\n")
+
+        for row, price in zip(rows, prices):
+            writer.writerow([row.get(column, "") for column in self.__header] + ["" if np.isnan(price) else float(price)])
+
+        return output.getvalue()
@@ -0,0 +1,116 @@
+from typing import Dict, Sequence
+import numpy as np
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler
+
+# Positions of the numeric inputs (rooms, bathrooms, size, parking_space, security)
+# in the label encoded row given to the ColumnTransformer
+NUMERIC_POSITIONS = [0, 1, 2, 3, 5]
+
+
+class FeatureEncoder:
+    """
+    Closed-form version of the fitted neighborhood LabelEncoder, one-hot
+    ColumnTransformer and x MinMaxScaler.
+
+    A scaled row is offset + numeric * numeric_scale on the numeric columns
+    plus the scale of the neighborhood one-hot column, so encoding is a dict
+    lookup and a couple of NumPy operations. Parameters are kept in float64 and
+    only the encoded rows are cast to dtype.
+    """
+
+    def __init__(
+        self,
+        neighborhood_columns: Dict[str, int],
+        numeric_columns: np.array,
+        scale: np.array,
+        offset: np.array,
+        sparse_features: bool = False,
+        dtype: np.dtype = np.float32,
+    ) -> None:
+        self.neighborhood_columns = neighborhood_columns
+        self.numeric_columns = numeric_columns
+        self.numeric_scale = scale[numeric_columns]
+        self.neighborhood_scale = scale
+        self.offset = offset
+        self.sparse_features = sparse_features
+        self.dtype = dtype
+        self.n_features = offset.shape[0]
+        self.dense_columns = np.union1d(numeric_columns, np.flatnonzero(offset))
+        self.__numeric_to_dense = np.searchsorted(self.dense_columns, numeric_columns)
+
+    @classmethod
+    def compile(
+        cls,
+        label_encoder: LabelEncoder,
+        column_transformer: ColumnTransformer,
+        x_min_max_scaler: MinMaxScaler,
+        sparse_features: bool = False,
+        dtype: np.dtype = np.float32,
+    ) -> "FeatureEncoder":
+        one_hot_slice = column_transformer.output_indices_["OneHot"]
+        remainder_slice = column_transformer.output_indices_["remainder"]
+        remainder_positions = list(column_transformer.transformers_[-1][2])
+
+        if remainder_positions != NUMERIC_POSITIONS:
+            raise Exception(f"Unexpected passthrough columns: {remainder_positions}")
+
+        categories = list(column_transformer.named_transformers_["OneHot"].categories_[0])
+
+        neighborhood_columns = {
+            neighborhood: one_hot_slice.start + categories.index(code)
+            for code, neighborhood in enumerate(label_encoder.classes_)
+            if code in categories
+        }
+
+        numeric_columns = np.arange(remainder_slice.start, remainder_slice.stop)
+
+        return cls(
+            neighborhood_columns=neighborhood_columns,
+            numeric_columns=numeric_columns,
+            scale=np.asarray(x_min_max_scaler.scale_, dtype=np.float64),
+            offset=np.asarray(x_min_max_scaler.min_, dtype=np.float64),
+            sparse_features=sparse_features,
+            dtype=dtype,
+        )
+
+    def neighborhood_column(self, neighborhoods: Sequence[str]) -> np.array:
+        try:
+            return np.fromiter(
+                (self.neighborhood_columns[neighborhood] for neighborhood in neighborhoods),
+                dtype=np.int64,
+                count=len(neighborhoods),
+            )
+
+        except KeyError as error:
+            raise ValueError(f"y contains previously unseen labels: {error}")
+
+    def encode(self, numeric: np.array, neighborhoods: Sequence[str]):
+        """
+        Encode a batch: numeric is (n, 5) with rooms, bathrooms, size,
+        parking_space and security level, neighborhoods has n names
+        """
+        numeric = np.asarray(numeric, dtype=np.float64)
+        hot_columns = self.neighborhood_column(neighborhoods)
+        rows = numeric.shape[0]
+
+        if self.sparse_features:
+            dense_values = np.tile(self.offset[self.dense_columns], (rows, 1))
+            dense_values[:, self.__numeric_to_dense] += numeric * self.numeric_scale
+
+            # Every row holds the dense columns followed by its one-hot column
+            data = np.column_stack([dense_values, self.neighborhood_scale[hot_columns]]).ravel().astype(self.dtype)
+            indices = np.column_stack([np.tile(self.dense_columns, (rows, 1)), hot_columns]).ravel()
+            indptr = np.arange(0, data.size + 1, self.dense_columns.size + 1)
+
+            encoded = sparse.csr_matrix((data, indices, indptr), shape=(rows, self.n_features), dtype=self.dtype)
+            encoded.sum_duplicates()
+
+            return encoded
+
+        encoded = np.tile(self.offset, (rows, 1))
+        encoded[:, self.numeric_columns] += numeric * self.numeric_scale
+        encoded[np.arange(rows), hot_columns] += self.neighborhood_scale[hot_columns]
+
+        return encoded.astype(self.dtype)
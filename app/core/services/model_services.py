@@ -1,38 +1,68 @@
-from typing import List
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Tuple
+from app.core.db import PGConnection
 from app.core.db.repositories import (
     ModelRepository,
     PropertyRepository,
     ModelHistoryRepository,
+    ModelProgressRepository,
 )
 from app.core.services.train_services import TrainServices
-from app.core.services.prediction_services import PredictionServices
+from app.core.services.prediction_batcher import PredictionBatcher
+from app.core.services.bulk_prediction_services import BulkPredictionServices
+from app.core.services.sweep_services import SweepServices
 from app.core.services.preprocessing_services import PreProcessingServices
 from app.core.entities import (
     Model,
     ModelInDB,
     Property,
     PredictedProperty,
+    PropertyType,
+    PriceSweep,
+    PriceSurface,
     ModelStatus,
     ModelWithHistory,
     SummarizedModel
 )
 from app.api.shared_schemas import GWOParams
+from app.api.dependencies import Bucket
 from app.core.configs import get_environment, get_logger
+from app.core.executors import get_inference_executor, get_io_executor, run_in_executor
+from app.core.metrics import PREDICTION_SECONDS, PREDICTIONS_IN_FLIGHT, track_stage
 
 _env = get_environment()
 _logger = get_logger(__name__)
 
 
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Opaque keyset cursor of the last listed model"""
+    content = json.dumps([created_at.isoformat(), id])
+    return base64.urlsafe_b64encode(content.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(id)
+
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
 class ModelServices:
     def __init__(
         self,
         model_repository: ModelRepository,
         property_repository: PropertyRepository,
         model_history_repository: ModelHistoryRepository,
+        model_progress_repository: ModelProgressRepository,
     ) -> None:
         self.__model_repository = model_repository
         self.__property_repository = property_repository
         self.__model_history_repository = model_history_repository
+        self.__model_progress_repository = model_progress_repository
 
     def pre_create_model(self, name: str, gwo_params: GWOParams) -> ModelInDB:
         lb_neurons = [gwo_params.min_neurons] * gwo_params.hidden_layers
@@ -89,13 +119,29 @@ class ModelServices:
             )
             _logger.debug(f"Model #{model_in_db.id} - In Training")
 
-            preprocessing = PreProcessingServices(file_url=file_url, model_id=model_in_db.id)
+            property_type = model_in_db.gwo_params.get("property_type")
+
+            # The worker connection stays checked out while training, read on a short-lived one
+            with PGConnection() as conn:
+                previous_state = ModelRepository(connection=conn).select_latest_preprocessing_state(
+                    property_type=property_type
+                )
+
+            preprocessing = PreProcessingServices(
+                file_url=file_url,
+                model_id=model_in_db.id,
+                previous_state=previous_state,
+                property_type=property_type,
+            )
+            model_in_db.dataset_snapshot = preprocessing.dataset_snapshot
+
+            _logger.debug(f"Model #{model_in_db.id} - Dataset snapshot {model_in_db.dataset_snapshot}")
 
             preprocessing.normalize()
 
             _logger.debug(f"Model #{model_in_db.id} - Normalized")
 
-            preprocessing.filter_best_characteristics(only=model_in_db.gwo_params.get("property_type"))
+            preprocessing.filter_best_characteristics(only=property_type)
 
             _logger.debug(f"Model #{model_in_db.id} - Filtered data")
 
@@ -152,16 +198,24 @@ class ModelServices:
 
         return model_in_db
 
-    def predict_price(self, model_id: int, property: Property) -> PredictedProperty:
-        prediction_services = PredictionServices()
+    async def predict_price(self, model_id: int, property: Property, property_type: PropertyType = None) -> PredictedProperty:
+        with PREDICTIONS_IN_FLIGHT.track_inprogress(), PREDICTION_SECONDS.time():
+            return await self.__predict_price(model_id=model_id, property=property, property_type=property_type)
 
-        latest_model = self.search_complete_model_by_id(id=model_id)
+    async def __predict_price(self, model_id: int, property: Property, property_type: PropertyType = None) -> PredictedProperty:
+        with track_stage("select_model"):
+            latest_model = await run_in_executor(
+                get_io_executor(), self.search_complete_model_by_id, id=model_id, property_type=property_type
+            )
 
         if not latest_model:
             _logger.debug(f"Model #{model_id} - Not found")
             return
 
-        preprocessing = PreProcessingServices(model=latest_model)
+        with track_stage("load_preprocessing"):
+            preprocessing = await run_in_executor(
+                get_io_executor(), PreProcessingServices.from_model, model=latest_model
+            )
 
         property_array = [
             property.rooms,
@@ -172,12 +226,14 @@ class ModelServices:
             property.flood_quota,
         ]
 
-        normalized_property = preprocessing.normalize_property(
-            property_array=property_array
-        )
+        with track_stage("encoding"):
+            # The sklearn fallback of old pipelines is slow, never run it on the event loop
+            normalized_property = await run_in_executor(
+                get_inference_executor(), preprocessing.normalize_property, property_array=property_array
+            )
 
-        price = prediction_services.predict(
-            bucket_path=latest_model.path, normalized_property=normalized_property
+        price = await PredictionBatcher.get_batcher(bucket_path=latest_model.path).predict(
+            normalized_property=normalized_property
         )
 
         predicted_property = PredictedProperty(
@@ -193,61 +249,126 @@ class ModelServices:
 
         return predicted_property
 
-    def search_latest(self) -> ModelInDB:
-        model_in_db = self.__model_repository.select_latest()
+    async def predict_price_bulk(
+        self, model_id: int, stream: AsyncIterator[bytes], ndjson: bool = False, property_type: PropertyType = None
+    ) -> AsyncIterator[str]:
+        latest_model = await run_in_executor(
+            get_io_executor(), self.search_complete_model_by_id, id=model_id, property_type=property_type
+        )
+
+        if not latest_model:
+            _logger.debug(f"Model #{model_id} - Not found")
+            return
+
+        preprocessing = await run_in_executor(
+            get_io_executor(), PreProcessingServices.from_model, model=latest_model
+        )
+
+        bulk_prediction_services = BulkPredictionServices(
+            model_in_db=latest_model, preprocessing=preprocessing, ndjson=ndjson
+        )
+
+        return bulk_prediction_services.predict(stream=stream)
+
+    async def predict_price_sweep(self, model_id: int, sweep: PriceSweep, property_type: PropertyType = None) -> PriceSurface:
+        latest_model = await run_in_executor(
+            get_io_executor(), self.search_complete_model_by_id, id=model_id, property_type=property_type
+        )
+
+        if not latest_model:
+            _logger.debug(f"Model #{model_id} - Not found")
+            return
+
+        preprocessing = await run_in_executor(
+            get_io_executor(), PreProcessingServices.from_model, model=latest_model
+        )
+
+        sweep_services = SweepServices(model_in_db=latest_model, preprocessing=preprocessing)
+
+        return await sweep_services.predict(sweep=sweep)
+
+    def search_latest(self, property_type: PropertyType = None) -> ModelInDB:
+        model_in_db = self.__model_repository.select_latest(property_type=property_type)
 
         return model_in_db
 
-    def search_models(self, page: int, page_size: int) -> List[ModelWithHistory]:
+    def search_models(
+        self, page_size: int, page: int = 1, cursor: str = None, include_history: bool = True
+    ) -> Tuple[List[ModelWithHistory], str]:
+        """
+        Return a page of models and the cursor of the next page (None on the
+        last one), the history is downsampled to the best mse per GWO epoch
+        """
+        after = decode_cursor(cursor) if cursor else None
+
+        # One extra model tells whether there is a next page
         models = self.__model_repository.select_models(
-            page=page, page_size=page_size
+            limit=page_size + 1, offset=(page - 1) * page_size, after=after
         )
 
-        models_id = []
+        next_cursor = None
 
-        for model in models:
-            if model.status == ModelStatus.READY and model.mse > 0:
-                models_id.append(model.id)
+        if len(models) > page_size:
+            models = models[:page_size]
+            next_cursor = encode_cursor(models[-1].created_at, models[-1].id)
 
-        histories = self.__model_history_repository.select_model_histories_by_model_id(models_id=models_id)
-
-        models_with_history = []
+        if include_history and models:
+            histories = self.__model_history_repository.select_best_per_epoch(
+                models_id=[model.id for model in models]
+            )
 
-        for model in models:
-            models_with_history.append(ModelWithHistory(
-                id=model.id,
-                name=model.name,
-                mse=model.mse,
-                status=model.status,
-                gwo_params=model.gwo_params,
-                created_at=model.created_at,
-                updated_at=model.updated_at,
-                history=histories.get(model.id, [])
-            ))
+            for model in models:
+                model.history = histories.get(model.id, [])
 
-        return models_with_history
+        return models, next_cursor
 
     def search_model_by_id(self, id: int) -> SummarizedModel:
         model = self.__model_repository.select_by_id(id=id)
 
         if model.status == ModelStatus.TRAINING:
-            remaining_time_in_seconds = self.__model_repository.select_remaining_time(model_id=id)
-            model.remaining_time_in_seconds = remaining_time_in_seconds
+            progress = self.__model_progress_repository.select_by_model_id(model_id=id)
+
+            if progress:
+                model.remaining_time_in_seconds = progress.remaining_time_in_seconds
 
         return model
 
     def delete_model_by_id(self, id: int) -> bool:
-        self.__model_history_repository.delete_by_model_id(model_id=id)
-        return self.__model_repository.delete_by_id(id=id)
+        artifact_paths = self.__model_repository.delete_by_id(id=id)
 
-    def search_complete_model_by_id(self, id: int) -> ModelInDB:
+        if artifact_paths is None:
+            return False
+
+        self.__delete_artifacts(artifact_paths)
+        return True
+
+    def prune_models(self, older_than_days: int = None, keep_ready: int = None) -> List[int]:
+        """Delete old ERROR and superseded READY models, return the deleted ids"""
+        ids, artifact_paths = self.__model_repository.delete_prunable(
+            older_than_days=older_than_days or _env.MODEL_PRUNE_OLDER_THAN_DAYS,
+            keep_ready=keep_ready or _env.MODEL_PRUNE_KEEP_READY,
+        )
+
+        _logger.info(f"{len(ids)} models pruned")
+
+        self.__delete_artifacts(artifact_paths)
+        return ids
+
+    def __delete_artifacts(self, artifact_paths: List[str]):
+        # The rows are already gone, the response does not wait for the bucket
+        if artifact_paths:
+            get_io_executor().submit(Bucket.delete_files, bucket_paths=artifact_paths)
+
+    def search_complete_model_by_id(self, id: int, property_type: PropertyType = None) -> ModelInDB:
         if id:
             model = self.__model_repository.select_complete_by_id(id=id)
 
         else:
-            model = self.__model_repository.select_latest()
+            model = self.__model_repository.select_latest(property_type=property_type)
 
         return model
 
-    def search_statistics(self) -> dict:
-        return self.__model_repository.select_model_statistics()
+    def search_statistics(self, window_days: int = None) -> dict:
+        return self.__model_repository.select_model_statistics(
+            window_days=window_days or _env.MODEL_STATISTICS_WINDOW_DAYS
+        )
@@ -0,0 +1,118 @@
+import asyncio
+from collections import OrderedDict
+from typing import List, Tuple
+import numpy as np
+from app.core.services.prediction_services import PredictionServices, stack_properties
+from app.core.configs import get_environment, get_logger
+from app.core.executors import get_inference_executor, get_io_executor, run_in_executor
+from app.core.metrics import PREDICTION_BATCH_SIZE
+
+_env = get_environment()
+_logger = get_logger(__name__)
+
+
+class PredictionBatcher:
+    """
+    Collects concurrent predictions for the same model during a small window
+    and resolves all of them with a single batched inference
+    """
+
+    # Each batcher keeps its model loaded, only the most recently used ones are kept
+    __batchers: "OrderedDict[str, PredictionBatcher]" = OrderedDict()
+
+    def __init__(self, bucket_path: str, window_ms: float, max_size: int) -> None:
+        self.__bucket_path = bucket_path
+        self.__window = window_ms / 1000
+        self.__max_size = max_size
+        self.__prediction_services = PredictionServices()
+        self.__pending: List[Tuple[np.array, asyncio.Future]] = []
+        self.__flush_handle: asyncio.TimerHandle = None
+        self.__lock = asyncio.Lock()
+
+    @classmethod
+    def get_batcher(cls, bucket_path: str) -> "PredictionBatcher":
+        batcher = cls.__batchers.get(bucket_path)
+
+        if batcher:
+            cls.__batchers.move_to_end(bucket_path)
+            return batcher
+
+        batcher = cls(
+            bucket_path=bucket_path,
+            window_ms=_env.PREDICTION_BATCH_WINDOW_MS,
+            max_size=_env.PREDICTION_BATCH_MAX_SIZE,
+        )
+        cls.__batchers[bucket_path] = batcher
+
+        # Requests already queued on an evicted batcher still finish, its model is released afterwards
+        while len(cls.__batchers) > _env.PREDICTION_MAX_MODELS:
+            evicted_path, _ = cls.__batchers.popitem(last=False)
+            _logger.debug(f"Releasing model {evicted_path}")
+
+        return batcher
+
+    async def predict(self, normalized_property: np.array) -> float:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self.__pending.append((normalized_property, future))
+
+        if len(self.__pending) >= self.__max_size:
+            self.__flush()
+
+        elif not self.__flush_handle:
+            self.__flush_handle = loop.call_later(self.__window, self.__flush)
+
+        return await future
+
+    async def predict_batch(self, normalized_properties: np.array) -> np.array:
+        """
+        Predict an already stacked batch right away, sharing the model
+        loaded by this batcher
+        """
+        PREDICTION_BATCH_SIZE.observe(normalized_properties.shape[0])
+
+        async with self.__lock:
+            await run_in_executor(
+                get_io_executor(),
+                self.__prediction_services.load_model,
+                bucket_path=self.__bucket_path,
+            )
+
+            return await run_in_executor(
+                get_inference_executor(),
+                self.__prediction_services.predict_batch,
+                bucket_path=self.__bucket_path,
+                normalized_properties=normalized_properties,
+            )
+
+    def __flush(self):
+        if self.__flush_handle:
+            self.__flush_handle.cancel()
+            self.__flush_handle = None
+
+        batch, self.__pending = self.__pending, []
+
+        if batch:
+            asyncio.ensure_future(self.__run(batch))
+
+    async def __run(self, batch: List[Tuple[np.array, asyncio.Future]]):
+        futures = [future for _, future in batch]
+
+        try:
+            prices = await self.predict_batch(
+                stack_properties([normalized_property for normalized_property, _ in batch])
+            )
+
+            _logger.debug(f"Batch of {len(batch)} predictions for {self.__bucket_path}")
+
+            for future, price in zip(futures, prices):
+                if not future.done():
+                    future.set_result(float(price))
+
+        except Exception as error:
+            _logger.error(f"Error on batch prediction: {str(error)}")
+
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
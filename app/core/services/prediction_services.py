@@ -1,29 +1,60 @@
-from app.api.dependencies import Bucket
+from app.core.cache import get_artifact_cache
+from app.core.metrics import track_cache, track_stage
 from keras.models import load_model
 import numpy as np
-import requests
-import tempfile
+from scipy import sparse
+
+
+def stack_properties(normalized_properties: list):
+    """Stack normalized rows (dense arrays or sparse rows) into one batch"""
+    if normalized_properties and sparse.issparse(normalized_properties[0]):
+        return sparse.vstack(normalized_properties, format="csr")
+
+    return np.vstack(normalized_properties)
 
 
 class PredictionServices:
 
+    def __init__(self) -> None:
+        self.trained_model = None
+        self.__bucket_path = None
+
     def predict(self, bucket_path: str, normalized_property: np.array) -> float:
-        
-        self.__load_model(bucket_path=bucket_path)
+        prediction = self.predict_batch(
+            bucket_path=bucket_path, normalized_properties=stack_properties([normalized_property])
+        )
+
+        return prediction[0]
+
+    def predict_batch(self, bucket_path: str, normalized_properties: np.array) -> np.array:
+        # Callers load the model first (and count the lookup), only load here when they did not
+        if not self.__is_loaded(bucket_path):
+            self.load_model(bucket_path=bucket_path)
+
+        if sparse.issparse(normalized_properties):
+            normalized_properties = normalized_properties.astype(np.float32, copy=False)
+
+        else:
+            normalized_properties = np.asarray(normalized_properties, dtype=np.float32)
 
-        list_property = list(normalized_property)
+        with track_stage("inference"):
+            prediction = self.trained_model.predict(
+                normalized_properties, batch_size=max(normalized_properties.shape[0], 1), verbose=0
+            )
 
-        prediction = self.trained_model.predict([list_property], batch_size=64)
+        return prediction[:, 0]
 
-        return prediction[0][0]
-    
-    def __load_model(self, bucket_path: str):
+    def load_model(self, bucket_path: str):
+        if self.__is_loaded(bucket_path):
+            track_cache("model", hit=True)
+            return
 
-        sign_url = Bucket.get_presigned_url(path=bucket_path)
+        track_cache("model", hit=False)
+        with get_artifact_cache().reading(bucket_path=bucket_path) as file_path:
+            with track_stage("deserialization"):
+                self.trained_model = load_model(file_path)
 
-        response = requests.get(sign_url)
-        with tempfile.NamedTemporaryFile(suffix=".h5", delete=False) as temp_model_file:
-            with open(temp_model_file.name, 'wb') as file:
-                file.write(response.content)
+        self.__bucket_path = bucket_path
 
-            self.trained_model = load_model(temp_model_file.name)
+    def __is_loaded(self, bucket_path: str) -> bool:
+        return self.trained_model is not None and self.__bucket_path == bucket_path
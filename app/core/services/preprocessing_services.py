@@ -1,254 +1,587 @@
-from typing import Tuple
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Tuple
+import os
 import pandas as pd
 import tempfile
+import threading
 import joblib
 import numpy as np
+from scipy import sparse
 from sklearn.preprocessing import LabelEncoder
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.model_selection import train_test_split
 from app.api.dependencies import Bucket
-from app.core.configs import get_environment
+from app.core.cache import get_artifact_cache, get_dataset_cache, get_split_cache
+from app.core.configs import get_environment, get_logger
+from app.core.metrics import track_cache, track_stage
 from app.core.entities import ModelInDB, PropertyType
+from app.core.services.feature_encoder import FeatureEncoder
+from app.core.services.preprocessing_state import PreprocessingState, STATE_FEATURES, STATE_VERSION, row_hashes
 from datetime import datetime
-import requests
 
 _env = get_environment()
+_logger = get_logger(__name__)
+
+PROPERTY_FEATURES = [
+    "rooms",
+    "bathrooms",
+    "size",
+    "parking_space",
+    "neighborhood_name",
+    "flood_quota",
+]
+
+EXPORT_DTYPES = {
+    "id": "int64",
+    "price": "float64",
+    "rooms": "int8",
+    "bathrooms": "int8",
+    "size": "float32",
+    "parking_space": "int16",
+    "type": "category",
+    "neighborhood_name": "category",
+    "flood_quota": "float64",
+    "modality_name": "category",
+}
+
+EXPORT_CATEGORIES = [column for column, dtype in EXPORT_DTYPES.items() if dtype == "category"]
+
+# Part of the dataset snapshot key, bump it whenever read_properties_export or EXPORT_DTYPES change
+SNAPSHOT_VERSION = 1
+
+PROPERTY_TYPES = {
+    "penthouse": "apartamento",
+    "flat": "apartamento",
+    "loft": "apartamento",
+    "sobrado": "casa",
+    "geminada": "casa",
+    "condominium": "casa",
+    "kitnet": "casa",
+}
+
+DEFAULT_FLOOD_QUOTA = 21
+
+PIPELINE_VERSION = 1
+
+# Flood quota boundaries (meters): below 8.13 is level 1, [8.13, 9.15) level 2,
+# [9.15, 12.6) level 3 and everything above is level 4
+SECURITY_BOUNDARIES = [8.13, 9.15, 12.6]
+
+LOADED_PREPROCESSINGS = 16
+
+# Keras computes in float32, so features and targets are kept in it end to end
+FEATURE_DTYPE = np.float32
+
+
+def read_properties_export(file_url: str, modality: str = None, chunk_size: int = None) -> pd.DataFrame:
+    """
+    Read only the used columns of a properties export with compact dtypes,
+    optionally filtering one modality chunk by chunk while reading
+    """
+    options = {
+        "delimiter": ";",
+        "quotechar": "|",
+        "index_col": "id",
+        "usecols": list(EXPORT_DTYPES),
+    }
+
+    if not chunk_size:
+        dataframe = pd.read_csv(file_url, dtype=EXPORT_DTYPES, **options)
+
+        if modality:
+            dataframe = dataframe[dataframe["modality_name"] == modality]
+
+        return dataframe
+
+    # Categories can differ between chunks, so they are only converted after the concat
+    chunk_dtypes = {column: "object" if column in EXPORT_CATEGORIES else dtype for column, dtype in EXPORT_DTYPES.items()}
+
+    chunks = []
+    for chunk in pd.read_csv(file_url, dtype=chunk_dtypes, chunksize=chunk_size, **options):
+        if modality:
+            chunk = chunk[chunk["modality_name"] == modality]
+
+        chunks.append(chunk)
+
+    dataframe = pd.concat(chunks) if chunks else pd.DataFrame(columns=list(EXPORT_DTYPES)).set_index("id")
+
+    return dataframe.astype({column: "category" for column in EXPORT_CATEGORIES})
+
+
+def security_level(flood_quota):
+    """Vectorized security level for a flood quota scalar, array or Series"""
+    flood_quota = pd.Series(flood_quota, dtype="float64").fillna(DEFAULT_FLOOD_QUOTA)
+    return np.digitize(flood_quota.to_numpy(), SECURITY_BOUNDARIES) + 1
+
+
+def security_level_scalar(flood_quota: float) -> int:
+    """Security level of a single flood quota, same levels as security_level"""
+    if flood_quota is None or flood_quota != flood_quota:
+        flood_quota = DEFAULT_FLOOD_QUOTA
+
+    return bisect_right(SECURITY_BOUNDARIES, flood_quota) + 1
+
+
+def min_max_transform_sparse(scaler: MinMaxScaler, x_sparse: sparse.spmatrix) -> sparse.csr_matrix:
+    """
+    Apply a fitted MinMaxScaler to a sparse matrix, only the columns with a
+    non-zero offset (the numeric ones) are filled for every row
+    """
+    x_sparse = sparse.csr_matrix(x_sparse, dtype=np.float64)
+    scaled = sparse.csr_matrix(x_sparse.multiply(scaler.scale_))
+
+    offset_columns = np.flatnonzero(scaler.min_)
+
+    if offset_columns.size:
+        rows = x_sparse.shape[0]
+        offsets = sparse.csr_matrix(
+            (
+                np.tile(scaler.min_[offset_columns], rows),
+                (np.repeat(np.arange(rows), offset_columns.size), np.tile(offset_columns, rows)),
+            ),
+            shape=x_sparse.shape,
+        )
+        scaled = scaled + offsets
+
+    return scaled
 
 
 class PreProcessingServices:
-    def __init__(self, model: ModelInDB=None, file_url: str=None, model_id: int=0) -> None:
+    __loaded: Dict[tuple, "PreProcessingServices"] = OrderedDict()
+    __loading: Dict[tuple, threading.Lock] = {}
+    __loaded_lock = threading.Lock()
+
+    def __init__(
+        self,
+        model: ModelInDB=None,
+        file_url: str=None,
+        model_id: int=0,
+        previous_state: str=None,
+        property_type: PropertyType=None,
+    ) -> None:
         self.label_encoder_neighborhood = LabelEncoder()
         self.onehot_encoder_properties = ColumnTransformer(
-            transformers=[("OneHot", OneHotEncoder(), [4])], remainder="passthrough"
+            transformers=[("OneHot", OneHotEncoder(), [4])],
+            remainder="passthrough",
+            sparse_threshold=1.0 if _env.SPARSE_FEATURES else 0.3,
         )
         self.x_min_max_scaler = MinMaxScaler()
         self.y_min_max_scaler = MinMaxScaler()
+        self.sparse_features = _env.SPARSE_FEATURES
         self.model_id = model_id
+        self.dataset_snapshot = ""
+        self.feature_encoder: FeatureEncoder = None
+        self.preprocessing_state: PreprocessingState = None
 
         if file_url:
             self.__file_url = file_url
-            self.load_dataframe()
+            self.load_dataframe(modality="venda", chunk_size=_env.PROPERTY_EXPORT_CHUNK_SIZE)
+            self.preprocessing_state = self.__load_preprocessing_state(previous_state, property_type)
+
+        elif model.preprocessing_pipeline:
+            self.__load_pipeline(model.preprocessing_pipeline)
 
         else:
+            self.sparse_features = False
             self.__load_label_encoder(model.neighborhood_encoder)
             self.__load_one_hot_encoder(model.one_hot_encoder)
             self.__load_x_min_max_scaler(model.x_min_max)
             self.__load_y_min_max_scaler(model.y_min_max)
 
-    def load_dataframe(self):
-        self.dataframe = pd.read_csv(
-            self.__file_url, delimiter=";", quotechar="|", index_col="id"
+        if model:
+            self.feature_encoder = self.__compile_feature_encoder()
+
+    @classmethod
+    def from_model(cls, model: ModelInDB) -> "PreProcessingServices":
+        """
+        Fitted preprocessing of a model, loaded and compiled only once per
+        process for the LOADED_PREPROCESSINGS most recently used models
+        """
+        key = (
+            model.id,
+            model.preprocessing_pipeline,
+            model.neighborhood_encoder,
+            model.one_hot_encoder,
+            model.x_min_max,
+            model.y_min_max,
         )
 
-    def normalize(self):
-        self.dataframe["main_type"] = self.dataframe["type"].apply(
-            self.__normalize_type
-        )
+        preprocessing = cls.__get_loaded(key)
+        if preprocessing is not None:
+            track_cache("preprocessing", hit=True)
+            return preprocessing
 
-        self.dataframe["flood_quota"] = self.dataframe["flood_quota"].apply(
-            self.__convert_flood_quota
-        )
+        with cls.__loaded_lock:
+            key_lock = cls.__loading.setdefault(key, threading.Lock())
 
-        self.dataframe["security"] = self.dataframe["flood_quota"].apply(
-            self.__check_security
-        )
+        # Concurrent misses of the same model wait for the first one instead of loading it again
+        with key_lock:
+            preprocessing = cls.__get_loaded(key)
+            track_cache("preprocessing", hit=preprocessing is not None)
 
-        self.dataframe["price"] = self.dataframe["price"].apply(lambda v: v / 1000)
+            if preprocessing is not None:
+                return preprocessing
 
-    def filter_best_characteristics(self, only: PropertyType = None):
-        self.sell_dataframe = self.dataframe[self.dataframe["modality_name"] == "venda"]
+            try:
+                preprocessing = cls(model=model, model_id=model.id)
 
-        if only:
-            self.sell_dataframe = self.sell_dataframe[self.sell_dataframe["main_type"] == only]
+                with cls.__loaded_lock:
+                    cls.__loaded[key] = preprocessing
 
-        self.x_properties = self.sell_dataframe.loc[
-            :,
-            [
-                "rooms",
-                "bathrooms",
-                "size",
-                "parking_space",
-                "neighborhood_name",
-                "security",
-            ],
-        ]
-        self.y_properties = self.sell_dataframe.loc[:, ["price"]]
+                    while len(cls.__loaded) > LOADED_PREPROCESSINGS:
+                        cls.__loaded.popitem(last=False)
 
-    def apply_label_encoder(self):
-        self.x_properties.iloc[:, 4] = self.label_encoder_neighborhood.fit_transform(
-            self.x_properties.iloc[:, 4]
-        )
+            finally:
+                with cls.__loaded_lock:
+                    cls.__loading.pop(key, None)
 
-    def apply_one_hot_encoder(self):
-        self.x_properties = self.onehot_encoder_properties.fit_transform(
-            self.x_properties
-        ).toarray()
+        return preprocessing
 
-    def scale(self):
-        self.x_properties_finished = self.x_min_max_scaler.fit_transform(
-            self.x_properties, self.y_properties
-        )
-        self.y_properties_finished = self.y_min_max_scaler.fit_transform(
-            self.y_properties
-        )
+    @classmethod
+    def __get_loaded(cls, key: tuple) -> "PreProcessingServices":
+        with cls.__loaded_lock:
+            preprocessing = cls.__loaded.get(key)
 
-    def split(self):
-        (
-            self.x_properties_train,
-            self.x_properties_test,
-            self.y_properties_train,
-            self.y_properties_test,
-        ) = train_test_split(
-            self.x_properties_finished, self.y_properties_finished, test_size=_env.TEST_SIZE, random_state=0
+            if preprocessing is not None:
+                cls.__loaded.move_to_end(key)
+
+            return preprocessing
+
+    def load_dataframe(self, modality: str = None, chunk_size: int = None):
+        self.dataset_snapshot, self.dataframe = get_dataset_cache().load(
+            self.__file_url,
+            variant=f"v{SNAPSHOT_VERSION}-{modality or 'all'}",
+            parse=lambda file_path: read_properties_export(
+                file_path, modality=modality, chunk_size=chunk_size
+            ),
         )
 
-    def save(self, model: ModelInDB) -> dict:
-        
-        model.neighborhood_encoder = self.__save_label_encoder()
-        model.one_hot_encoder = self.__save_one_hot_encoder()
-        model.x_min_max = self.__save_x_min_max()
-        model.y_min_max = self.__save_y_min_max()
+        # Listings are tracked by id, repeated ids in the export keep their last row
+        self.dataframe = self.dataframe[~self.dataframe.index.duplicated(keep="last")]
 
-    def normalize_property(self, property_array: list) -> np.array:
-        flood_quota = self.__convert_flood_quota(property_array[-1])
-        property_array[-1] = self.__check_security(flood_quota)
-        
-        property_array[4] = self.label_encoder_neighborhood.transform([property_array[4]])[0]
+    def normalize(self):
+        self.row_hashes = row_hashes(self.dataframe)
+        changed_ids = self.preprocessing_state.changed_ids(self.row_hashes)
 
-        property_array = self.onehot_encoder_properties.transform([property_array]).toarray()[0]
+        _logger.info(f"Model #{self.model_id} - Normalizing {len(changed_ids)} new or changed of {len(self.row_hashes)} rows")
 
-        property_array = self.x_min_max_scaler.transform([property_array])[0]
-        return property_array
-    
-    def desnormalize(self, price: float, mse: float) -> Tuple[float, float]:
-        prices = self.y_min_max_scaler.inverse_transform([[price, mse]])
+        self.dataframe = self.dataframe.loc[changed_ids]
 
-        return round(prices[0][0], 2) * 1000, round(prices[0][1], 2) * 1000
+        types = self.dataframe["type"].astype("object")
+        self.dataframe["main_type"] = types.map(PROPERTY_TYPES).fillna(types)
 
-    def __save_label_encoder(self) -> str:
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_label_encoder:
+        self.dataframe["flood_quota"] = self.dataframe["flood_quota"].fillna(DEFAULT_FLOOD_QUOTA)
 
-            joblib.dump(self.label_encoder_neighborhood, temp_label_encoder.name)
+        self.dataframe["security"] = security_level(self.dataframe["flood_quota"])
 
-            bucket_path = self.__get_model_path(model_name="NEIGHBORHOOD_ENCODER", type="joblib")
+        self.dataframe["price"] = self.dataframe["price"] / 1000
 
-            Bucket.save_file(bucket_path, temp_label_encoder.name)
+    def filter_best_characteristics(self, only: PropertyType = None):
+        self.sell_dataframe = self.dataframe[self.dataframe["modality_name"] == "venda"]
 
-        return bucket_path
+        if only:
+            self.sell_dataframe = self.sell_dataframe[self.sell_dataframe["main_type"] == only]
 
-    def __save_one_hot_encoder(self) -> str:
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as one_hot_encoder:
+        outdated = self.preprocessing_state.update(self.row_hashes, self.sell_dataframe)
 
-            joblib.dump(self.onehot_encoder_properties, one_hot_encoder.name)
+        _logger.info(f"Model #{self.model_id} - {len(self.sell_dataframe)} rows merged, {outdated} outdated rows dropped")
 
-            bucket_path = self.__get_model_path(model_name="ONE_HOT_ENCODER", type="joblib")
+        self.x_properties = self.preprocessing_state.features.loc[:, STATE_FEATURES]
+        self.y_properties = self.preprocessing_state.features.loc[:, ["price"]]
 
-            Bucket.save_file(bucket_path, one_hot_encoder.name)
+    def apply_label_encoder(self):
+        self.label_encoder_neighborhood.fit(self.preprocessing_state.vocabulary())
 
-        return bucket_path
+        self.x_properties = self.x_properties.astype({"neighborhood_name": "object"})
+        self.x_properties.iloc[:, 4] = self.label_encoder_neighborhood.transform(
+            self.x_properties.iloc[:, 4]
+        )
 
-    def __save_x_min_max(self) -> str:
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_x_min_max:
+    def apply_one_hot_encoder(self):
+        # One row per vocabulary code is enough to fit the same categories as the full dataset
+        codes = np.arange(len(self.label_encoder_neighborhood.classes_))
+        vocabulary_rows = pd.DataFrame(0, index=codes, columns=self.x_properties.columns)
+        vocabulary_rows["neighborhood_name"] = codes.astype(object)
+
+        self.onehot_encoder_properties.fit(vocabulary_rows)
+        self.x_properties = self.__to_layout(
+            self.onehot_encoder_properties.transform(self.x_properties)
+        )
 
-            joblib.dump(self.x_min_max_scaler, temp_x_min_max.name)
+    def scale(self):
+        self.__fit_scalers()
 
-            bucket_path = self.__get_model_path(model_name="X_MIN_MAX", type="joblib")
+        if self.sparse_features:
+            self.x_properties_finished = min_max_transform_sparse(
+                self.x_min_max_scaler, self.x_properties
+            )
 
-            Bucket.save_file(bucket_path, temp_x_min_max.name)
+        else:
+            self.x_properties_finished = self.x_min_max_scaler.transform(
+                self.x_properties
+            )
 
-        return bucket_path
+        self.y_properties_finished = self.y_min_max_scaler.transform(
+            self.y_properties
+        )
 
-    def __save_y_min_max(self) -> str:
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_y_min_max:
-            joblib.dump(self.y_min_max_scaler, temp_y_min_max.name)
+        self.x_properties_finished = self.__as_feature_dtype(self.x_properties_finished)
+        self.y_properties_finished = self.__as_feature_dtype(self.y_properties_finished)
 
-            bucket_path = self.__get_model_path(model_name="Y_MIN_MAX", type="joblib")
+    def split(self):
+        split_cache = get_split_cache()
+        key = split_cache.key(self.dataset_snapshot, self.__split_config()) if self.dataset_snapshot else None
 
-            Bucket.save_file(bucket_path, temp_y_min_max.name)
+        arrays = split_cache.load(key) if key else None
 
-        return bucket_path
-    
-    def __load_label_encoder(self, bucket_path: str):
-        sign_url = Bucket.get_presigned_url(path=bucket_path)
+        if arrays is None:
+            x_train, x_test, y_train, y_test = train_test_split(
+                self.x_properties_finished, self.y_properties_finished, test_size=_env.TEST_SIZE, random_state=0
+            )
 
-        response = requests.get(sign_url)
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_model_file:
-            with open(temp_model_file.name, 'wb') as file:
-                file.write(response.content)
+            arrays = {
+                "x_train": self.__as_feature_dtype(x_train),
+                "x_test": self.__as_feature_dtype(x_test),
+                "y_train": self.__as_feature_dtype(y_train),
+                "y_test": self.__as_feature_dtype(y_test),
+            }
 
-            self.label_encoder_neighborhood = joblib.load(temp_model_file.name)
+            if key:
+                arrays = split_cache.store(key, arrays)
 
-    def __load_one_hot_encoder(self, bucket_path: str):
-        sign_url = Bucket.get_presigned_url(path=bucket_path)
+        self.x_properties_train = arrays["x_train"]
+        self.x_properties_test = arrays["x_test"]
+        self.y_properties_train = arrays["y_train"]
+        self.y_properties_test = arrays["y_test"]
 
-        response = requests.get(sign_url)
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_model_file:
-            with open(temp_model_file.name, 'wb') as file:
-                file.write(response.content)
+    def save(self, model: ModelInDB) -> dict:
+        model.preprocessing_pipeline = self.__save_pipeline()
+        model.preprocessing_state = self.__save_artifact(
+            self.preprocessing_state.to_artifact(), model_name="PREPROCESSING_STATE"
+        )
 
-            self.onehot_encoder_properties = joblib.load(temp_model_file.name)
+    def normalize_property(self, property_array: list) -> np.array:
+        if self.feature_encoder:
+            rooms, bathrooms, size, parking_space, neighborhood_name, flood_quota = property_array
 
-    def __load_x_min_max_scaler(self, bucket_path: str):
-        sign_url = Bucket.get_presigned_url(path=bucket_path)
+            encoded = self.feature_encoder.encode(
+                [[rooms, bathrooms, size, parking_space, security_level_scalar(flood_quota)]],
+                [neighborhood_name],
+            )
 
-        response = requests.get(sign_url)
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_model_file:
-            with open(temp_model_file.name, 'wb') as file:
-                file.write(response.content)
+            # A one-row CSR matrix already is the sparse row, slicing it only adds a copy
+            return encoded if sparse.issparse(encoded) else encoded[0]
 
-            self.x_min_max_scaler = joblib.load(temp_model_file.name)
+        properties = pd.DataFrame([property_array], columns=PROPERTY_FEATURES)
 
-    def __load_y_min_max_scaler(self, bucket_path: str):
-        sign_url = Bucket.get_presigned_url(path=bucket_path)
+        return self.normalize_properties(properties)[0]
 
-        response = requests.get(sign_url)
-        with tempfile.NamedTemporaryFile(suffix=".joblib", delete=False) as temp_model_file:
-            with open(temp_model_file.name, 'wb') as file:
-                file.write(response.content)
+    def normalize_properties(self, properties: pd.DataFrame) -> np.array:
+        if self.feature_encoder:
+            return self.__encode_properties(self.feature_encoder, properties)
 
-            self.y_min_max_scaler = joblib.load(temp_model_file.name)
+        return self.__normalize_properties_sklearn(properties)
 
-    def __normalize_type(self, value):
-        if value == "penthouse":
-            return "apartamento"
+    def __encode_properties(self, feature_encoder: FeatureEncoder, properties: pd.DataFrame):
+        numeric = properties.loc[:, ["rooms", "bathrooms", "size", "parking_space"]].to_numpy(dtype=np.float64)
 
-        elif value == "flat":
-            return "apartamento"
+        return feature_encoder.encode(
+            np.column_stack([numeric, security_level(properties["flood_quota"])]),
+            properties["neighborhood_name"].tolist(),
+        )
 
-        elif value == "loft":
-            return "apartamento"
+    def __normalize_properties_sklearn(self, properties: pd.DataFrame) -> np.array:
+        properties = properties.loc[:, PROPERTY_FEATURES].copy()
 
-        elif value == "sobrado":
-            return "casa"
+        properties["flood_quota"] = security_level(properties["flood_quota"])
 
-        elif value == "geminada":
-            return "casa"
+        properties["neighborhood_name"] = self.label_encoder_neighborhood.transform(
+            properties["neighborhood_name"]
+        )
 
-        elif value == "condominium":
-            return "casa"
+        properties_array = self.__to_layout(
+            self.onehot_encoder_properties.transform(properties.to_numpy(dtype=object))
+        )
 
-        elif value == "kitnet":
-            return "casa"
+        if self.sparse_features:
+            return self.__as_feature_dtype(min_max_transform_sparse(self.x_min_max_scaler, properties_array))
 
-        return value
+        return self.__as_feature_dtype(self.x_min_max_scaler.transform(properties_array))
 
-    def __convert_flood_quota(self, value):
-        return 21 if pd.isna(value) else value
+    def known_neighborhoods(self, neighborhoods: pd.Series) -> pd.Series:
+        return neighborhoods.isin(self.label_encoder_neighborhood.classes_)
 
-    def __check_security(self, value):
-        if value < 8.13:
-            return 1
+    def desnormalize(self, price: float, mse: float) -> Tuple[float, float]:
+        prices = self.y_min_max_scaler.inverse_transform([[price, mse]])
 
-        elif 8.14 < value < 9.15:
-            return 2
+        return round(prices[0][0], 2) * 1000, round(prices[0][1], 2) * 1000
 
-        elif 9.16 < value < 12.6:
-            return 3
+    def desnormalize_prices(self, prices: np.array) -> np.array:
+        prices = self.y_min_max_scaler.inverse_transform(np.reshape(prices, (-1, 1)))
+
+        return np.round(prices[:, 0], 2) * 1000
+
+    def __compile_feature_encoder(self) -> FeatureEncoder:
+        try:
+            feature_encoder = FeatureEncoder.compile(
+                label_encoder=self.label_encoder_neighborhood,
+                column_transformer=self.onehot_encoder_properties,
+                x_min_max_scaler=self.x_min_max_scaler,
+                sparse_features=self.sparse_features,
+                dtype=FEATURE_DTYPE,
+            )
+
+            probes = self.__probe_properties()
+            encoded = self.__encode_properties(feature_encoder, probes)
+            expected = self.__normalize_properties_sklearn(probes)
+
+            if sparse.issparse(encoded):
+                encoded, expected = encoded.toarray(), expected.toarray()
+
+            if encoded.shape == expected.shape and np.allclose(encoded, expected, rtol=0, atol=1e-6):
+                return feature_encoder
+
+            _logger.warning(f"Model #{self.model_id} - Feature encoder differs from sklearn transforms")
+
+        except Exception as error:
+            _logger.warning(f"Model #{self.model_id} - Feature encoder not compiled: {str(error)}")
+
+        return None
+
+    def __probe_properties(self) -> pd.DataFrame:
+        neighborhoods = list(self.label_encoder_neighborhood.classes_)
+        positions = np.arange(len(neighborhoods))
+        flood_quotas = [None, 7.0, 8.13, 9.5, 12.6, 30.0]
+
+        return pd.DataFrame({
+            "rooms": positions % 5 + 1,
+            "bathrooms": positions % 3 + 1,
+            "size": 35.5 + positions * 17.25,
+            "parking_space": positions % 4,
+            "neighborhood_name": neighborhoods,
+            "flood_quota": [flood_quotas[position % len(flood_quotas)] for position in positions],
+        })
+
+    def __split_config(self) -> dict:
+        return {
+            "property_type": self.preprocessing_state.property_type,
+            "test_size": _env.TEST_SIZE,
+            "random_state": 0,
+            "sparse_features": self.sparse_features,
+            "dtype": np.dtype(FEATURE_DTYPE).name,
+            "pipeline_version": PIPELINE_VERSION,
+            "state_version": STATE_VERSION,
+        }
+
+    def __fit_scalers(self):
+        """
+        Fit the scalers from the running extrema of the preprocessing state,
+        one-hot columns range from 0 (1 with a single neighborhood) to 1
+        """
+        state = self.preprocessing_state
+        rows = self.x_properties.shape[0]
+        numeric_columns = [column for column in STATE_FEATURES if column != "neighborhood_name"]
+
+        x_extrema = np.zeros((2, self.x_properties.shape[1]))
+        one_hot = self.onehot_encoder_properties.output_indices_["OneHot"]
+        remainder = self.onehot_encoder_properties.output_indices_["remainder"]
+
+        x_extrema[0, one_hot] = 0 if len(state.neighborhood_counts) > 1 else 1
+        x_extrema[1, one_hot] = 1
+        x_extrema[0, remainder] = state.minimum[numeric_columns]
+        x_extrema[1, remainder] = state.maximum[numeric_columns]
+
+        self.x_min_max_scaler.fit(x_extrema)
+        self.x_min_max_scaler.n_samples_seen_ = rows
+
+        self.y_min_max_scaler.fit(pd.DataFrame({"price": [state.minimum["price"], state.maximum["price"]]}))
+        self.y_min_max_scaler.n_samples_seen_ = rows
+
+    def __load_preprocessing_state(self, bucket_path: str, property_type: PropertyType) -> PreprocessingState:
+        if not bucket_path:
+            return PreprocessingState(property_type=property_type)
+
+        try:
+            artifact = self.__load_artifact(bucket_path)
+
+        except Exception as error:
+            _logger.warning(f"Model #{self.model_id} - Preprocessing state not loaded: {str(error)}")
+            return PreprocessingState(property_type=property_type)
+
+        return PreprocessingState.from_artifact(artifact, property_type=property_type)
+
+    def __as_feature_dtype(self, array):
+        """Contiguous FEATURE_DTYPE copy of a dense array or CSR matrix, without copying when it already is"""
+        if sparse.issparse(array):
+            return sparse.csr_matrix(array, dtype=FEATURE_DTYPE)
+
+        return np.ascontiguousarray(array, dtype=FEATURE_DTYPE)
+
+    def __to_layout(self, properties_array):
+        if self.sparse_features:
+            return sparse.csr_matrix(properties_array)
+
+        return properties_array.toarray() if sparse.issparse(properties_array) else properties_array
+
+    def __save_pipeline(self) -> str:
+        pipeline = {
+            "version": PIPELINE_VERSION,
+            "features": PROPERTY_FEATURES,
+            "sparse_features": self.sparse_features,
+            "neighborhood_encoder": self.label_encoder_neighborhood,
+            "one_hot_encoder": self.onehot_encoder_properties,
+            "x_min_max": self.x_min_max_scaler,
+            "y_min_max": self.y_min_max_scaler,
+        }
+
+        return self.__save_artifact(pipeline, model_name="PREPROCESSING_PIPELINE")
+
+    def __save_artifact(self, artifact, model_name: str) -> str:
+        bucket_path = self.__get_model_path(model_name=model_name, type="joblib")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, f"{model_name}.joblib")
+            joblib.dump(artifact, file_path)
+
+            Bucket.save_file(bucket_path, file_path)
+            get_artifact_cache().put(bucket_path=bucket_path, file_path=file_path)
 
-        else:
-            return 4
+        return bucket_path
+
+    def __load_pipeline(self, bucket_path: str):
+        pipeline = self.__load_artifact(bucket_path)
+
+        if pipeline.get("version") != PIPELINE_VERSION:
+            raise Exception(f"Unsupported preprocessing pipeline version: {pipeline.get('version')}")
+
+        if pipeline["features"] != PROPERTY_FEATURES:
+            raise Exception(f"Preprocessing pipeline features mismatch: {pipeline['features']}")
+
+        self.sparse_features = pipeline.get("sparse_features", False)
+        self.label_encoder_neighborhood = pipeline["neighborhood_encoder"]
+        self.onehot_encoder_properties = pipeline["one_hot_encoder"]
+        self.x_min_max_scaler = pipeline["x_min_max"]
+        self.y_min_max_scaler = pipeline["y_min_max"]
+
+    def __load_label_encoder(self, bucket_path: str):
+        self.label_encoder_neighborhood = self.__load_artifact(bucket_path)
+
+    def __load_one_hot_encoder(self, bucket_path: str):
+        self.onehot_encoder_properties = self.__load_artifact(bucket_path)
+
+    def __load_x_min_max_scaler(self, bucket_path: str):
+        self.x_min_max_scaler = self.__load_artifact(bucket_path)
+
+    def __load_y_min_max_scaler(self, bucket_path: str):
+        self.y_min_max_scaler = self.__load_artifact(bucket_path)
+
+    def __load_artifact(self, bucket_path: str):
+        with get_artifact_cache().reading(bucket_path=bucket_path) as file_path:
+            with track_stage("deserialization"):
+                return joblib.load(file_path)
 
     def __get_model_path(self, model_name: str, type: str) -> str:
         now = datetime.now()
@@ -0,0 +1,127 @@
+from typing import List
+import numpy as np
+import pandas as pd
+
+STATE_VERSION = 1
+
+STATE_FEATURES = [
+    "rooms",
+    "bathrooms",
+    "size",
+    "parking_space",
+    "neighborhood_name",
+    "security",
+]
+
+STATE_TARGET = "price"
+
+# Columns whose running minimum and maximum are kept (the neighborhood is one-hot encoded)
+NUMERIC_COLUMNS = [column for column in STATE_FEATURES if column != "neighborhood_name"] + [STATE_TARGET]
+
+
+def row_hashes(dataframe: pd.DataFrame) -> pd.Series:
+    """Hash of every export row by id, used to find new and changed listings"""
+    return pd.util.hash_pandas_object(dataframe, index=False)
+
+
+class PreprocessingState:
+    """
+    Incremental preprocessing state of a training dataset.
+
+    Keeps the hash of every export row by id, the normalized features and
+    price of the rows used for training, the neighborhood vocabulary (as
+    counts) and the running min/max of the numeric columns, so a retrain only
+    normalizes the rows that are new or changed since the previous model.
+    """
+
+    def __init__(self, property_type: str = None) -> None:
+        self.property_type = property_type
+        self.row_hashes = pd.Series(dtype="uint64")
+        self.features = pd.DataFrame(columns=STATE_FEATURES + [STATE_TARGET])
+        self.neighborhood_counts = pd.Series(dtype="int64")
+        self.minimum = pd.Series(np.nan, index=NUMERIC_COLUMNS)
+        self.maximum = pd.Series(np.nan, index=NUMERIC_COLUMNS)
+
+    @classmethod
+    def from_artifact(cls, artifact: dict, property_type: str = None) -> "PreprocessingState":
+        """
+        Restore a persisted state, a state of another version or property
+        type is discarded and the dataset is processed from scratch
+        """
+        state = cls(property_type=property_type)
+
+        if artifact.get("version") != STATE_VERSION or artifact.get("property_type") != property_type:
+            return state
+
+        state.row_hashes = artifact["row_hashes"]
+        state.features = artifact["features"]
+        state.neighborhood_counts = artifact["neighborhood_counts"]
+        state.minimum = artifact["minimum"]
+        state.maximum = artifact["maximum"]
+
+        return state
+
+    def to_artifact(self) -> dict:
+        return {
+            "version": STATE_VERSION,
+            "property_type": self.property_type,
+            "row_hashes": self.row_hashes,
+            "features": self.features,
+            "neighborhood_counts": self.neighborhood_counts,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+        }
+
+    def changed_ids(self, hashes: pd.Series) -> pd.Index:
+        """Ids of the rows that are new or changed compared to this state"""
+        known = hashes.index.isin(self.row_hashes.index)
+        previous = self.row_hashes.reindex(hashes.index, fill_value=0)
+
+        return hashes.index[~known | (previous.to_numpy() != hashes.to_numpy())]
+
+    def update(self, hashes: pd.Series, delta: pd.DataFrame) -> int:
+        """
+        Merge the normalized new/changed rows (already filtered for training)
+        and drop the rows that were changed or removed from the export,
+        returns how many cached rows were dropped
+        """
+        outdated = self.features.index.intersection(
+            self.row_hashes.index.difference(hashes.index).union(self.changed_ids(hashes))
+        )
+        outdated_rows = self.features.loc[outdated]
+        delta = delta.loc[:, STATE_FEATURES + [STATE_TARGET]].astype({"neighborhood_name": "object"})
+
+        kept = self.features.drop(index=outdated)
+        self.features = pd.concat([kept, delta]) if len(kept) else delta
+
+        self.neighborhood_counts = (
+            self.neighborhood_counts
+            .sub(outdated_rows["neighborhood_name"].value_counts(), fill_value=0)
+            .add(delta["neighborhood_name"].value_counts(), fill_value=0)
+        )
+        self.neighborhood_counts = self.neighborhood_counts[self.neighborhood_counts > 0].astype("int64")
+
+        self.__update_extrema(outdated_rows, delta)
+        self.row_hashes = hashes
+
+        return len(outdated)
+
+    def vocabulary(self) -> List[str]:
+        return sorted(self.neighborhood_counts.index)
+
+    def __update_extrema(self, outdated_rows: pd.DataFrame, delta: pd.DataFrame):
+        outdated_rows = outdated_rows.loc[:, NUMERIC_COLUMNS].astype("float64")
+
+        # A running extremum only has to be recomputed when a dropped row held it
+        if (
+            (outdated_rows.min() <= self.minimum).any()
+            or (outdated_rows.max() >= self.maximum).any()
+            or self.minimum.isna().any()
+        ):
+            features = self.features.loc[:, NUMERIC_COLUMNS].astype("float64")
+            self.minimum, self.maximum = features.min(), features.max()
+            return
+
+        delta = delta.loc[:, NUMERIC_COLUMNS].astype("float64")
+        self.minimum = np.fmin(self.minimum, delta.min())
+        self.maximum = np.fmax(self.maximum, delta.max())
@@ -0,0 +1,83 @@
+from typing import Tuple
+import numpy as np
+import pandas as pd
+from app.core.services.prediction_batcher import PredictionBatcher
+from app.core.services.preprocessing_services import PreProcessingServices, PROPERTY_FEATURES
+from app.core.entities import ModelInDB, PriceSweep, PriceSurface
+from app.core.configs import get_environment, get_logger
+from app.core.metrics import track_stage
+from app.core.executors import get_inference_executor, run_in_executor
+
+_env = get_environment()
+_logger = get_logger(__name__)
+
+
+class SweepServices:
+    """
+    Prices every combination of one or two swept attributes of a base
+    property with one vectorized encoding and one batched inference
+    """
+
+    def __init__(self, model_in_db: ModelInDB, preprocessing: PreProcessingServices) -> None:
+        self.__model_in_db = model_in_db
+        self.__preprocessing = preprocessing
+
+    async def predict(self, sweep: PriceSweep) -> PriceSurface:
+        axes = [dimension.grid_values() for dimension in sweep.dimensions]
+        shape = tuple(len(axis) for axis in axes)
+
+        if int(np.prod(shape)) > _env.PREDICTION_SWEEP_MAX_POINTS:
+            raise Exception(f"Sweep has {int(np.prod(shape))} points, the limit is {_env.PREDICTION_SWEEP_MAX_POINTS}")
+
+        # Building and encoding the grid is CPU-bound, keep it off the event loop as well
+        properties, valid, normalized_properties = await run_in_executor(
+            get_inference_executor(), self.__encode_grid, sweep=sweep, axes=axes
+        )
+
+        prices = np.full(len(properties), np.nan)
+
+        if valid.any():
+            predictions = await PredictionBatcher.get_batcher(bucket_path=self.__model_in_db.path).predict_batch(
+                normalized_properties
+            )
+
+            prices[valid] = self.__preprocessing.desnormalize_prices(predictions)
+
+        _logger.debug(f"Sweep of {len(properties)} points priced with model #{self.__model_in_db.id}")
+
+        _, mse = self.__preprocessing.desnormalize(0, self.__model_in_db.mse)
+
+        return PriceSurface(
+            property=sweep.property,
+            dimensions=[dimension.attribute for dimension in sweep.dimensions],
+            axes=axes,
+            predicted_prices=np.where(np.isnan(prices), None, prices).reshape(shape).tolist(),
+            mse=mse,
+        )
+
+    def __encode_grid(self, sweep: PriceSweep, axes: list) -> Tuple[pd.DataFrame, np.array, np.array]:
+        with track_stage("encoding"):
+            properties = self.__build_grid(sweep, axes)
+
+            valid = self.__preprocessing.known_neighborhoods(properties["neighborhood_name"]).to_numpy()
+
+            if not valid.any():
+                return properties, valid, None
+
+            return properties, valid, self.__preprocessing.normalize_properties(properties[valid])
+
+    def __build_grid(self, sweep: PriceSweep, axes: list) -> pd.DataFrame:
+        grid = np.meshgrid(*[np.asarray(axis, dtype=object) for axis in axes], indexing="ij")
+        base = sweep.property.model_dump()
+
+        properties = pd.DataFrame(
+            {feature: np.full(grid[0].size, base[feature], dtype=object) for feature in PROPERTY_FEATURES}
+        )
+
+        for dimension, values in zip(sweep.dimensions, grid):
+            properties[dimension.attribute.value] = values.ravel()
+
+        numeric_features = [feature for feature in PROPERTY_FEATURES if feature != "neighborhood_name"]
+        properties[numeric_features] = properties[numeric_features].apply(pd.to_numeric, errors="coerce")
+
+        return properties
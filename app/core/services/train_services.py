@@ -1,17 +1,21 @@
 from typing import List, Tuple
 from mealpy.swarm_based.GWO import BaseGWO
 import numpy as np
+from scipy import sparse
 from keras.models import Sequential
-from keras.layers import Dense
+from keras.layers import Dense, Input
 from keras.optimizers import SGD
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from datetime import datetime
+import os
 import tempfile
+import time
 from app.core.configs import get_environment, get_logger
 from app.core.entities import ModelHistory, ModelInDB
 from app.core.db import PGConnection
-from app.core.db.repositories import ModelHistoryRepository
+from app.core.db.repositories import ModelHistoryRepository, ModelProgressRepository
 from app.api.dependencies import Bucket
+from app.core.cache import get_artifact_cache
 
 
 _env = get_environment()
@@ -34,22 +38,37 @@ class TrainServices:
         self.mse = 1
         self.epoch = 1
         self.model_in_db = model_in_db
-        self.__model_history_repository = ModelHistoryRepository(connection=PGConnection())
+        self.__connection = PGConnection()
+        self.__model_history_repository = ModelHistoryRepository(connection=self.__connection)
+        self.__model_progress_repository = ModelProgressRepository(connection=self.__connection)
         self.__mount_params()
         self.__save_gwo_params()
 
     def train(self) -> Tuple[float, str]:
         _logger.info(f"Starting train at {datetime.now()}")
 
-        with tempfile.NamedTemporaryFile(suffix=".h5", delete=False) as temp_model_file:
-            self.find_best_fitness_with_gwo()
-            self.save(file=temp_model_file.name)
+        try:
+            # GWO evaluates the initial population and then the whole population on every epoch
+            self.__model_progress_repository.start(
+                model_id=self.model_in_db.id,
+                total=(self.model_in_db.epochs + 1) * self.model_in_db.population_size,
+            )
 
-            bucket_path = self.__get_model_path()
+            with tempfile.TemporaryDirectory() as temp_dir:
+                self.find_best_fitness_with_gwo()
 
-            Bucket.save_file(bucket_path, temp_model_file.name)
+                model_file = os.path.join(temp_dir, "model.h5")
+                self.save(file=model_file)
 
-            _logger.info(f"Model trained at {datetime.now()}")
+                bucket_path = self.__get_model_path()
+
+                Bucket.save_file(bucket_path, model_file)
+                get_artifact_cache().put(bucket_path=bucket_path, file_path=model_file)
+
+                _logger.info(f"Model trained at {datetime.now()}")
+
+        finally:
+            self.__connection.close()
 
         return self.mse, bucket_path
 
@@ -64,6 +83,7 @@ class TrainServices:
         _logger.info(f"Finished GWO - {((datetime.now() - start).seconds) / 60} minutes!")
 
     def fitness_func(self, solution: tuple) -> float:
+        start = time.perf_counter()
         max_iter = int(solution[0])
         learning_rate = solution[1]
         momentum = solution[2]
@@ -73,6 +93,11 @@ class TrainServices:
 
         model = Sequential()
 
+        model.add(Input(
+            shape=(self.x_properties_train.shape[1],),
+            sparse=sparse.issparse(self.x_properties_train),
+        ))
+
         for hidden_units in hidden_layer_sizes:
             model.add(Dense(units=hidden_units, activation="relu"))
 
@@ -98,6 +123,12 @@ class TrainServices:
             batch_size=batch_size
         )
 
+        self.__model_progress_repository.record_evaluation(
+            model_id=self.model_in_db.id,
+            duration_seconds=time.perf_counter() - start,
+            alpha=_env.MODEL_PROGRESS_EWMA_ALPHA,
+        )
+
         if mse < self.mse:
             self.mse = mse
             self.model = model
@@ -38,14 +38,15 @@ class KombuWorker(ConsumerMixin):
             _logger.info(f"Message received at {infos['routing_key']}")
             message.ack()
             callback = self.queues.get_function(infos["routing_key"])
-            pg_connection = PGConnection()
-            callback = callback(pg_connection)
-            event_schema = payload_conversor(body)
-            if event_schema:
-                if isinstance(event_schema.payload, str):
-                    event_schema.payload = json.loads(event_schema.payload)
-
-                callback.handle(event_schema)
+
+            with PGConnection() as pg_connection:
+                callback = callback(pg_connection)
+                event_schema = payload_conversor(body)
+                if event_schema:
+                    if isinstance(event_schema.payload, str):
+                        event_schema.payload = json.loads(event_schema.payload)
+
+                    callback.handle(event_schema)
 
             _logger.info(f"Message consumed at {event_schema.id}")
 
@@ -0,0 +1,97 @@
+"""
+Benchmark of PreProcessingServices.normalize against the previous row-wise implementation
+
+Run from the project root (same .env as the API):
+    python -m benchmarks.normalize_benchmark [data/1297.csv]
+"""
+
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+from app.core.services.preprocessing_services import PreProcessingServices, SECURITY_BOUNDARIES
+from app.core.services.preprocessing_state import PreprocessingState, row_hashes
+
+
+def legacy_normalize(dataframe: pd.DataFrame) -> pd.DataFrame:
+    def normalize_type(value):
+        if value in ("penthouse", "flat", "loft"):
+            return "apartamento"
+
+        elif value in ("sobrado", "geminada", "condominium", "kitnet"):
+            return "casa"
+
+        return value
+
+    def convert_flood_quota(value):
+        return 21 if pd.isna(value) else value
+
+    def check_security(value):
+        if value < 8.13:
+            return 1
+
+        elif 8.14 < value < 9.15:
+            return 2
+
+        elif 9.16 < value < 12.6:
+            return 3
+
+        else:
+            return 4
+
+    dataframe["main_type"] = dataframe["type"].apply(normalize_type)
+    dataframe["flood_quota"] = dataframe["flood_quota"].apply(convert_flood_quota)
+    dataframe["security"] = dataframe["flood_quota"].apply(check_security)
+    dataframe["price"] = dataframe["price"].apply(lambda v: v / 1000)
+    return dataframe
+
+
+def vectorized_normalize(dataframe: pd.DataFrame, state: PreprocessingState = None) -> pd.DataFrame:
+    preprocessing = PreProcessingServices.__new__(PreProcessingServices)
+    preprocessing.model_id = 0
+    preprocessing.dataframe = dataframe
+    # Without a previous state every row is new, so the whole dataset is normalized
+    preprocessing.preprocessing_state = state or PreprocessingState()
+    preprocessing.normalize()
+    return preprocessing.dataframe
+
+
+def main(file_path: str, repeat: int = 5):
+    dataframe = pd.read_csv(file_path, delimiter=";", quotechar="|", index_col="id")
+    # Same as load_dataframe, normalize tracks listings by id
+    dataframe = dataframe[~dataframe.index.duplicated(keep="last")]
+
+    legacy = legacy_normalize(dataframe.copy())
+    vectorized = vectorized_normalize(dataframe.copy())
+
+    pd.testing.assert_series_equal(legacy["main_type"], vectorized["main_type"])
+    pd.testing.assert_series_equal(legacy["flood_quota"], vectorized["flood_quota"])
+    pd.testing.assert_series_equal(legacy["price"], vectorized["price"])
+
+    # The legacy bins left gaps ([8.13, 8.14] and [9.15, 9.16]) that fell into level 4
+    in_gaps = vectorized["flood_quota"].between(SECURITY_BOUNDARIES[0], 8.14) | vectorized["flood_quota"].between(
+        SECURITY_BOUNDARIES[1], 9.16
+    )
+    same_security = (legacy["security"] == vectorized["security"]) | in_gaps
+    assert same_security.all(), "Security levels differ outside the legacy gaps"
+
+    legacy_time = min(timeit.repeat(lambda: legacy_normalize(dataframe.copy()), number=1, repeat=repeat))
+    vectorized_time = min(timeit.repeat(lambda: vectorized_normalize(dataframe.copy()), number=1, repeat=repeat))
+
+    # A retrain on the same export only hashes the rows, none of them changed
+    state = PreprocessingState()
+    state.row_hashes = row_hashes(dataframe)
+    unchanged_time = min(
+        timeit.repeat(lambda: vectorized_normalize(dataframe.copy(), state=state), number=1, repeat=repeat)
+    )
+
+    print(f"Rows: {len(dataframe)}")
+    print(f"Rows inside legacy security gaps: {int(in_gaps.sum())}")
+    print(f"Legacy (row-wise): {legacy_time * 1000:.2f} ms")
+    print(f"Vectorized: {vectorized_time * 1000:.2f} ms")
+    print(f"Speedup: {legacy_time / vectorized_time:.1f}x")
+    print(f"Vectorized, retrain without changed rows: {unchanged_time * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "data/1297.csv")
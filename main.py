@@ -12,5 +12,5 @@ if __name__ == "__main__":
         host=_env.APPLICATION_HOST,
         port=_env.APPLICATION_PORT,
         reload=False,
-        workers=1
+        workers=_env.APPLICATION_WORKERS
     )
@@ -0,0 +1,19 @@
+import argparse
+
+from app.core.db.migrator import Migrator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the pending database migrations")
+    parser.add_argument("--status", action="store_true", help="only list the pending migrations")
+    args = parser.parse_args()
+
+    migrator = Migrator()
+
+    if args.status:
+        for migration in migrator.pending():
+            print(f"pending {migration.version:04d} {migration.name}")
+
+    else:
+        for migration in migrator.migrate():
+            print(f"applied {migration.version:04d} {migration.name}")
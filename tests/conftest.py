@@ -0,0 +1,18 @@
+"""
+Settings without defaults get dummy values so the modules import without a .env
+"""
+
+import os
+
+for name, value in {
+    "PROPERTY_API_URL": "http://localhost",
+    "RBMQ_HOST": "localhost",
+    "RBMQ_USER": "guest",
+    "RBMQ_PASS": "guest",
+    "RBMQ_PORT": "5672",
+    "RBMQ_EXCHANGE": "test",
+    "RBMQ_VHOST": "/",
+    "PREFETCH_VALUE": "1",
+    "TRAIN_MODEL_CHANNEL": "test",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,75 @@
+"""
+In-memory stand-ins for the collaborators of the prediction services
+"""
+
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+def model_in_db(**fields):
+    from app.core.entities import ModelInDB
+
+    return ModelInDB(**{
+        "id": 1,
+        "path": "models/model #1.h5",
+        "epochs": 1,
+        "population_size": 10,
+        "mse": 0.5,
+        "created_at": datetime.now(),
+        "updated_at": datetime.now(),
+        **fields,
+    })
+
+
+class FakePreprocessing:
+    """Prices a property by its size, only knows the neighborhoods it is given"""
+
+    def __init__(self, neighborhoods=("centro",)) -> None:
+        self.neighborhoods = set(neighborhoods)
+        self.normalize_threads = []
+
+    def known_neighborhoods(self, neighborhoods: pd.Series) -> pd.Series:
+        return neighborhoods.isin(self.neighborhoods)
+
+    def normalize_properties(self, properties: pd.DataFrame) -> np.array:
+        self.normalize_threads.append(threading.current_thread())
+        return properties[["size"]].to_numpy(dtype=np.float32)
+
+    def desnormalize_prices(self, prices: np.array) -> np.array:
+        return np.asarray(prices, dtype=np.float64) * 1000
+
+    def desnormalize(self, price: float, mse: float):
+        return price * 1000, mse * 1000
+
+
+class FakePredictionServices:
+    def load_model(self, bucket_path: str):
+        pass
+
+    def predict_batch(self, bucket_path: str, normalized_properties: np.array) -> np.array:
+        return np.asarray(normalized_properties)[:, 0]
+
+
+class FakeBatcher:
+    """Shared batcher of a model, records how many batches it predicted"""
+
+    def __init__(self) -> None:
+        self.batches = 0
+
+    async def predict_batch(self, normalized_properties):
+        self.batches += 1
+        return FakePredictionServices().predict_batch("", normalized_properties)
+
+
+class FakeConnection:
+    """Records the statements run by a repository and answers them with the given results"""
+
+    def __init__(self, results=None) -> None:
+        self.results = results
+        self.statements = []
+
+    def fetch_with_retry(self, sql_statement: str, values=None, all: bool = False, prepare: bool = None):
+        self.statements.append((sql_statement, values))
+        return self.results
@@ -0,0 +1,66 @@
+import os
+import threading
+import pytest
+from app.core.cache.artifact_cache import ArtifactCache
+
+
+def write(path, content: bytes) -> str:
+    with open(path, "wb") as file:
+        file.write(content)
+
+    return str(path)
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Serve downloads from a dict of bucket path -> content"""
+    contents = {}
+
+    def download(self, bucket_path):
+        source = write(self._ArtifactCache__objects_directory + "/../download", contents[bucket_path])
+
+        with open(source, "rb") as file:
+            return self._ArtifactCache__store(file, suffix=".h5")
+
+    monkeypatch.setattr(ArtifactCache, "_ArtifactCache__download", download)
+    return contents
+
+
+def test_reading_yields_the_stored_content(tmp_path):
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_bytes=1024)
+    cache.put("models/a.h5", write(tmp_path / "a.h5", b"model a"))
+
+    with cache.reading("models/a.h5") as file_path:
+        with open(file_path, "rb") as file:
+            assert file.read() == b"model a"
+
+
+def test_reading_fetches_again_an_evicted_object(tmp_path, downloads):
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_bytes=1024)
+    object_path = cache.put("models/a.h5", write(tmp_path / "a.h5", b"model a"))
+    downloads["models/a.h5"] = b"model a"
+
+    os.remove(object_path)
+
+    with cache.reading("models/a.h5") as file_path:
+        with open(file_path, "rb") as file:
+            assert file.read() == b"model a"
+
+
+def test_eviction_waits_for_readers(tmp_path):
+    cache = ArtifactCache(directory=str(tmp_path / "cache"), max_bytes=10)
+    cache.put("models/a.h5", write(tmp_path / "a.h5", b"model a"))
+    new_model = write(tmp_path / "b.h5", b"model b")
+
+    with cache.reading("models/a.h5") as file_path:
+        writer = threading.Thread(target=cache.put, args=("models/b.h5", new_model))
+        writer.start()
+        writer.join(timeout=0.5)
+
+        assert writer.is_alive()
+        assert os.path.exists(file_path)
+
+    writer.join(timeout=5)
+
+    assert not writer.is_alive()
+    assert not os.path.exists(file_path)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.core.services import bulk_prediction_services
+from app.core.services.bulk_prediction_services import BulkPredictionServices, RecordSplitter
+from tests.fakes import FakeBatcher, FakePreprocessing, model_in_db
+
+
+@pytest.fixture(autouse=True)
+def batchers(monkeypatch):
+    """One fake batcher per model path, like PredictionBatcher.get_batcher"""
+    batchers = {}
+    monkeypatch.setattr(
+        bulk_prediction_services.PredictionBatcher,
+        "get_batcher",
+        lambda bucket_path: batchers.setdefault(bucket_path, FakeBatcher()),
+    )
+    return batchers
+
+
+async def stream_of(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def predict(body, preprocessing=None, ndjson=False, chunk_size=2, split=7) -> str:
+    services = BulkPredictionServices(
+        model_in_db=model_in_db(),
+        preprocessing=preprocessing or FakePreprocessing(),
+        ndjson=ndjson,
+        chunk_size=chunk_size,
+    )
+    body = body.encode("utf-8")
+    chunks = [body[start:start + split] for start in range(0, len(body), split)]
+
+    async def collect():
+        return "".join([part async for part in services.predict(stream_of(*chunks))])
+
+    return asyncio.run(collect())
+
+
+CSV_BODY = (
+    "rooms;bathrooms;parking_space;size;neighborhood_name;flood_quota\n"
+    "2;1;1;100;centro;\n"
+    "2;1;1;50;nowhere;\n"
+    "3;2;1;80;centro;10\n"
+)
+
+
+def test_csv_rows_are_priced_in_order_with_a_price_column():
+    lines = predict(CSV_BODY).splitlines()
+
+    assert lines[0].endswith(";predicted_price")
+    assert lines[1].endswith(";100000.0")
+    assert lines[2].endswith("nowhere;;")
+    assert lines[3].endswith(";80000.0")
+
+
+def test_ndjson_invalid_rows_come_back_with_an_error():
+    body = "\n".join(json.dumps(row) for row in [
+        {"rooms": 2, "bathrooms": 1, "parking_space": 1, "size": 100, "neighborhood_name": "centro"},
+        {"rooms": 2, "bathrooms": 1, "parking_space": 1, "size": 100, "neighborhood_name": "nowhere"},
+    ])
+
+    rows = [json.loads(line) for line in predict(body, ndjson=True).splitlines()]
+
+    assert rows[0]["predicted_price"] == 100000
+    assert rows[1]["predicted_price"] is None and rows[1]["error"]
+
+
+def test_chunks_are_normalized_off_the_event_loop():
+    preprocessing = FakePreprocessing()
+
+    predict(CSV_BODY, preprocessing=preprocessing)
+
+    assert preprocessing.normalize_threads
+    assert threading.main_thread() not in preprocessing.normalize_threads
+
+
+def test_malformed_ndjson_lines_are_answered_with_an_error():
+    body = "\n".join([
+        '{"rooms": 2, "bathrooms": 1, "parking_space": 1, "size": 100, "neighborhood_name": "centro"}',
+        '{"rooms": 2,',
+        '[1, 2]',
+        '{"rooms": 3, "bathrooms": 1, "parking_space": 1, "size": 90, "neighborhood_name": "centro"}',
+    ])
+
+    rows = [json.loads(line) for line in predict(body, ndjson=True).splitlines()]
+
+    assert [row["predicted_price"] for row in rows] == [100000, None, None, 90000]
+    assert rows[1] == {"line": '{"rooms": 2,', "predicted_price": None, "error": "Invalid JSON"}
+    assert rows[2]["error"] == "Each line must be a JSON object"
+
+
+def test_quoted_csv_fields_may_contain_line_breaks():
+    body = (
+        "rooms;bathrooms;parking_space;size;neighborhood_name;description\n"
+        "2;1;1;100;centro;|first line\nsecond; line|\n"
+        "2;1;1;60;centro;|ação|\n"
+    )
+
+    lines = predict(body, split=5).splitlines()
+
+    assert lines[1:4] == [
+        "2;1;1;100;centro;|first line",
+        "second; line|;100000.0",
+        "2;1;1;60;centro;ação;60000.0",
+    ]
+
+
+def test_record_splitter_keeps_quoted_line_breaks_in_one_record():
+    records = RecordSplitter(quotechar="|")
+
+    assert records.feed("a;|x\n") == 0
+    assert records.feed("y|;b\nc;d") == 1
+    assert records.feed("", final=True) == 1
+    assert list(records) == ["a;|x\ny|;b\n", "c;d"]
+
+
+def test_chunks_are_predicted_by_the_shared_batcher_of_the_model(batchers):
+    predict(CSV_BODY, chunk_size=2)
+
+    assert list(batchers) == [model_in_db().path]
+    assert batchers[model_in_db().path].batches == 2
@@ -0,0 +1,73 @@
+import os
+import pandas as pd
+import pytest
+from app.core.cache import dataset_cache
+from app.core.cache.dataset_cache import DatasetCache
+
+
+class FakeResponse:
+    def __init__(self, content: bytes, etag: str) -> None:
+        self.content = content
+        self.headers = {"ETag": f'"{etag}"'}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.content
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+@pytest.fixture
+def exports(monkeypatch):
+    """Serve exports from a dict of url -> (content, etag)"""
+    served = {}
+    monkeypatch.setattr(dataset_cache.requests, "get", lambda url, stream: FakeResponse(*served[url]))
+    return served
+
+
+def parser(calls: list):
+    def parse(file_path: str) -> pd.DataFrame:
+        calls.append(file_path)
+        return pd.read_csv(file_path)
+
+    return parse
+
+
+def test_an_unchanged_export_is_parsed_once(tmp_path, exports):
+    cache = DatasetCache(directory=str(tmp_path), max_snapshots=5)
+    exports["export"] = (b"id,price\n1,10\n", "etag-1")
+    calls = []
+
+    first_id, first = cache.load("export", variant="v1-venda", parse=parser(calls))
+    second_id, second = cache.load("export", variant="v1-venda", parse=parser(calls))
+
+    assert len(calls) == 1
+    assert first_id == second_id
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_a_new_variant_parses_the_export_again(tmp_path, exports):
+    cache = DatasetCache(directory=str(tmp_path), max_snapshots=5)
+    exports["export"] = (b"id,price\n1,10\n", "etag-1")
+    calls = []
+
+    cache.load("export", variant="v1-venda", parse=parser(calls))
+    cache.load("export", variant="v2-venda", parse=parser(calls))
+
+    assert len(calls) == 2
+
+
+def test_only_the_newest_snapshots_are_kept(tmp_path, exports):
+    cache = DatasetCache(directory=str(tmp_path), max_snapshots=2)
+
+    for index in range(4):
+        exports[f"export-{index}"] = (f"id,price\n1,{index}\n".encode(), f"etag-{index}")
+        cache.load(f"export-{index}", variant="v1-venda", parse=parser([]))
+
+    assert len([name for name in os.listdir(tmp_path / "snapshots") if name.endswith(".parquet")]) == 2
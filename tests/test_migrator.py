@@ -0,0 +1,48 @@
+import pytest
+from app.core.db.migrator import MIGRATIONS_DIR, Migrator
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    for file_name in ("0002_add_column.sql", "0010_add_index.sql", "0001_create_table.sql", "README.md", "0003-bad-name.sql"):
+        (tmp_path / file_name).write_text(f"-- {file_name}\n")
+
+    return tmp_path
+
+
+def test_migrations_are_sorted_by_version(migrations_dir):
+    migrations = Migrator(str(migrations_dir)).migrations()
+
+    assert [(migration.version, migration.name) for migration in migrations] == [
+        (1, "create_table"),
+        (2, "add_column"),
+        (10, "add_index"),
+    ]
+
+
+def test_duplicated_versions_are_rejected(migrations_dir):
+    (migrations_dir / "002_other_column.sql").write_text("")
+
+    with pytest.raises(Exception, match="Duplicated migration versions"):
+        Migrator(str(migrations_dir)).migrations()
+
+
+def test_checksum_changes_with_the_content(migrations_dir):
+    migration = Migrator(str(migrations_dir)).migrations()[0]
+    checksum = migration.checksum()
+
+    (migrations_dir / "0001_create_table.sql").write_text("-- changed\n")
+
+    assert migration.checksum() != checksum
+
+
+def test_only_unapplied_migrations_are_pending(migrations_dir, monkeypatch):
+    monkeypatch.setattr(Migrator, "applied", lambda self: {1: "checksum", 10: "checksum"})
+
+    assert [migration.version for migration in Migrator(str(migrations_dir)).pending()] == [2]
+
+
+def test_shipped_migrations_are_numbered_in_sequence():
+    versions = [migration.version for migration in Migrator(MIGRATIONS_DIR).migrations()]
+
+    assert versions == list(range(1, len(versions) + 1))
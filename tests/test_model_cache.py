@@ -0,0 +1,99 @@
+from prometheus_client import REGISTRY
+from app.core.cache.model_cache import ModelCache
+from tests.fakes import model_in_db
+
+
+class Loader:
+    """Counts the database loads of a model row"""
+
+    def __init__(self, **fields) -> None:
+        self.fields = fields
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return model_in_db(**self.fields)
+
+
+def row_lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("greywolf_cache_requests_total", {"cache": "model_row", "result": result}) or 0
+
+
+def enabled_cache(max_models: int = 2) -> ModelCache:
+    cache = ModelCache(max_models=max_models)
+    cache.enable()
+    return cache
+
+
+def test_disabled_cache_always_loads():
+    cache = ModelCache(max_models=2)
+    load = Loader(id=1)
+
+    cache.get("in_db", 1, load)
+    cache.get("in_db", 1, load)
+
+    assert load.calls == 2
+
+
+def test_rows_are_served_as_copies_and_counted_apart_from_the_prediction_models():
+    cache = enabled_cache()
+    load = Loader(id=1)
+    hits, misses = row_lookups("hit"), row_lookups("miss")
+
+    first = cache.get("in_db", 1, load)
+    first.mse = 99
+    second = cache.get("in_db", 1, load)
+
+    assert load.calls == 1
+    assert second.mse == 0.5
+    assert (row_lookups("hit") - hits, row_lookups("miss") - misses) == (1, 1)
+
+
+def test_invalidation_drops_the_model_and_every_latest_pointer():
+    cache = enabled_cache(max_models=4)
+    model, other, latest = Loader(id=1), Loader(id=2), Loader(id=2)
+
+    for _ in range(2):
+        cache.get("in_db", 1, model)
+        cache.get("in_db", 2, other)
+        cache.get_latest(None, latest)
+        cache.invalidate(1)
+
+    assert (model.calls, other.calls, latest.calls) == (2, 1, 2)
+
+
+def test_load_racing_with_an_invalidation_is_not_stored():
+    cache = enabled_cache()
+    calls = []
+
+    def racing_load():
+        calls.append(1)
+        cache.invalidate(1)
+        return model_in_db(id=1)
+
+    cache.get("in_db", 1, racing_load)
+    cache.get("in_db", 1, racing_load)
+
+    assert len(calls) == 2
+
+
+def test_disabling_drops_the_cached_rows():
+    cache = enabled_cache()
+    load = Loader(id=1)
+
+    cache.get("in_db", 1, load)
+    cache.disable()
+    cache.enable()
+    cache.get("in_db", 1, load)
+
+    assert load.calls == 2
+
+
+def test_least_recently_used_rows_are_evicted():
+    cache = enabled_cache(max_models=2)
+    loads = {id: Loader(id=id) for id in (1, 2, 3)}
+
+    for id in (1, 2, 1, 3, 1, 2):
+        cache.get("in_db", id, loads[id])
+
+    assert [loads[id].calls for id in (1, 2, 3)] == [1, 2, 1]
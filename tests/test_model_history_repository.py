@@ -0,0 +1,58 @@
+import numpy as np
+from app.core.db.repositories.model_history_repository import ModelHistoryRepository, history_arrays
+from tests.fakes import FakeConnection
+
+
+def aggregate(model_id, hidden_layer_sizes):
+    """One row of select_history_arrays, evaluations of a model share their depth"""
+    evaluations = len(hidden_layer_sizes)
+
+    return {
+        "model_id": model_id,
+        "epoch": list(range(1, evaluations + 1)),
+        "mse": [0.5] * evaluations,
+        "max_iter": [10] * evaluations,
+        "learning_rate": [0.01] * evaluations,
+        "momentum": [0.9] * evaluations,
+        "batch_size": [32] * evaluations,
+        "hidden_layer_sizes": hidden_layer_sizes,
+    }
+
+
+def test_hidden_layers_are_padded_to_the_deepest_network():
+    arrays = history_arrays([
+        aggregate(1, [[8, 4], [16, 2]]),
+        aggregate(2, [[32, 16, 8]]),
+    ])
+
+    assert arrays.model_id.tolist() == [1, 1, 2]
+    assert arrays.epoch.tolist() == [1, 2, 1]
+    assert arrays.hidden_layer_sizes.tolist() == [[8, 4, 0], [16, 2, 0], [32, 16, 8]]
+    assert arrays.hidden_layer_sizes.dtype == np.int32
+
+
+def test_flattened_hidden_layers_are_reshaped_per_evaluation():
+    result = aggregate(1, [[8, 4], [16, 2]])
+    result["hidden_layer_sizes"] = [[8, 4, 16, 2]]
+
+    arrays = history_arrays([result])
+
+    assert arrays.hidden_layer_sizes.tolist() == [[8, 4], [16, 2]]
+
+
+def test_no_history_gives_empty_columns():
+    arrays = ModelHistoryRepository(FakeConnection(results=None)).select_history_arrays(models_id=[1])
+
+    assert arrays.model_id.shape == (0,)
+    assert arrays.hidden_layer_sizes.shape == (0, 0)
+
+
+def test_rows_with_only_params_are_kept_in_the_arrays():
+    conn = FakeConnection(results=[aggregate(1, [[8, 4]])])
+
+    arrays = ModelHistoryRepository(conn).select_history_arrays()
+
+    query, _ = conn.statements[-1]
+    assert "mh.max_iter IS NOT NULL OR mh.params::jsonb ? 'max_iter'" in query
+    assert "COALESCE(mh.hidden_layer_sizes" in query
+    assert arrays.hidden_layer_sizes.tolist() == [[8, 4]]
@@ -0,0 +1,26 @@
+from datetime import datetime
+from app.core.db.repositories.model_repository import ModelRepository
+from tests.fakes import FakeConnection
+
+
+def test_models_are_listed_from_the_given_offset():
+    conn = FakeConnection(results=[])
+
+    ModelRepository(conn).select_models(limit=11, offset=20)
+
+    _, values = conn.statements[-1]
+    assert values["limit"] == 11
+    assert values["offset"] == 20
+    assert values["after_id"] is None
+
+
+def test_keyset_listing_ignores_the_offset():
+    conn = FakeConnection(results=[])
+    after = (datetime(2024, 1, 1), 7)
+
+    ModelRepository(conn).select_models(limit=11, offset=20, after=after)
+
+    query, values = conn.statements[-1]
+    assert "(m.created_at, m.id) <" in query
+    assert values["offset"] == 0
+    assert (values["after_created_at"], values["after_id"]) == after
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.application import create_app
+from app.api.composers import model_composer
+from app.core.services import bulk_prediction_services
+from app.core.services.bulk_prediction_services import BulkPredictionServices
+from tests.fakes import FakeBatcher, FakePreprocessing, model_in_db
+
+
+class FakeModelServices:
+    async def predict_price_bulk(self, model_id, stream, ndjson=False, property_type=None):
+        services = BulkPredictionServices(
+            model_in_db=model_in_db(), preprocessing=FakePreprocessing(), ndjson=ndjson, chunk_size=2
+        )
+        return services.predict(stream=stream)
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(bulk_prediction_services.PredictionBatcher, "get_batcher", lambda bucket_path: FakeBatcher())
+
+    app = create_app()
+    app.dependency_overrides[model_composer] = FakeModelServices
+    return app
+
+
+def post(app, path: str, parts, content_type: str) -> tuple:
+    """
+    Send the body in several http.request messages, like a server reading a
+    large upload, on ASGI spec 2.3 where the response listens for disconnects
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", content_type.encode()), (b"host", b"testserver")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": part, "more_body": True} for part in parts[:-1]]
+    messages.append({"type": "http.request", "body": parts[-1], "more_body": False})
+    sent = []
+
+    async def run():
+        finished = asyncio.Event()
+
+        async def receive():
+            if messages:
+                await asyncio.sleep(0)
+                return messages.pop(0)
+
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished.set()
+
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    asyncio.run(run())
+
+    status = next(message["status"] for message in sent if message["type"] == "http.response.start")
+    body = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+
+    return status, body.decode("utf-8")
+
+
+def test_bulk_upload_in_several_parts_prices_every_row(app):
+    rows = "".join(f"2;1;1;{size};centro;\n" for size in range(50, 70))
+    body = ("rooms;bathrooms;parking_space;size;neighborhood_name;flood_quota\n" + rows).encode("utf-8")
+    parts = [body[start:start + 16] for start in range(0, len(body), 16)]
+
+    status, response = post(app, "/models/predict/price/bulk", parts, "text/csv")
+
+    lines = response.splitlines()
+    assert status == 200
+    assert len(lines) == 21
+    assert [float(line.rsplit(";", 1)[1]) for line in lines[1:]] == [size * 1000.0 for size in range(50, 70)]
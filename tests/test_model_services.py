@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.core.entities import ModelStatus, ModelWithHistory, SummarizedModel
+from app.core.services import model_services
+from app.core.services.model_services import ModelServices, decode_cursor, encode_cursor
+from tests.fakes import FakeConnection, model_in_db
+
+CREATED_AT = datetime(2024, 1, 1)
+
+
+class FakeModelRepository:
+    """Lists 5 READY models newest first, like the models query"""
+
+    def __init__(self) -> None:
+        self.models = [
+            ModelWithHistory(id=id, created_at=CREATED_AT + timedelta(days=id), updated_at=CREATED_AT)
+            for id in range(5, 0, -1)
+        ]
+
+    def select_models(self, limit, offset=0, after=None):
+        models = self.models
+
+        if after:
+            models = [model for model in models if (model.created_at, model.id) < after]
+            offset = 0
+
+        return models[offset:offset + limit]
+
+
+@pytest.fixture
+def listing_services():
+    return ModelServices(
+        model_repository=FakeModelRepository(),
+        property_repository=None,
+        model_history_repository=None,
+        model_progress_repository=None,
+    )
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(CREATED_AT, 3)) == (CREATED_AT, 3)
+
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_pages_do_not_skip_models(listing_services):
+    pages = [
+        [model.id for model in listing_services.search_models(page_size=2, page=page, include_history=False)[0]]
+        for page in (1, 2, 3)
+    ]
+
+    assert pages == [[5, 4], [3, 2], [1]]
+
+
+def test_cursor_walks_every_model_once(listing_services):
+    ids, cursor = [], None
+
+    while True:
+        models, cursor = listing_services.search_models(page_size=2, cursor=cursor, include_history=False)
+        ids += [model.id for model in models]
+
+        if cursor is None:
+            break
+
+    assert ids == [5, 4, 3, 2, 1]
+
+
+class FakeTrainingModelRepository:
+    def __init__(self) -> None:
+        self.statuses = []
+
+    def select_by_id(self, id):
+        return SummarizedModel(id=id, status=ModelStatus.SCHEDULED, created_at=CREATED_AT, updated_at=CREATED_AT)
+
+    def select_latest_preprocessing_state(self, property_type=None):
+        raise AssertionError("The preprocessing state must not be read on the worker connection")
+
+    def update_status(self, new_status, model_id):
+        self.statuses.append(new_status)
+        return True
+
+
+class FakePropertyRepository:
+    def get_all_properties(self, model_id):
+        return "http://properties/export.csv"
+
+
+class ShortLivedConnection(FakeConnection):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+
+def test_previous_preprocessing_state_is_read_on_a_short_lived_connection(monkeypatch):
+    connections = []
+
+    def open_connection():
+        connections.append(ShortLivedConnection(results={"preprocessing_state": "state.pkl"}))
+        return connections[-1]
+
+    monkeypatch.setattr(model_services, "PGConnection", open_connection)
+
+    previous_states = []
+
+    def stop_before_training(previous_state, **kwargs):
+        previous_states.append(previous_state)
+        raise Exception("Stop before loading the dataset")
+
+    monkeypatch.setattr(model_services, "PreProcessingServices", stop_before_training)
+
+    model_repository = FakeTrainingModelRepository()
+    services = ModelServices(
+        model_repository=model_repository,
+        property_repository=FakePropertyRepository(),
+        model_history_repository=None,
+        model_progress_repository=None,
+    )
+
+    services.train_and_save_model(model_in_db(gwo_params={"property_type": None}))
+
+    assert previous_states == ["state.pkl"]
+    assert len(connections) == 1 and connections[0].closed
+    assert model_repository.statuses == [ModelStatus.TRAINING, ModelStatus.ERROR]
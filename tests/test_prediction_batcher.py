@@ -0,0 +1,28 @@
+from collections import OrderedDict
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.core.services import prediction_batcher
+from app.core.services.prediction_batcher import PredictionBatcher
+
+
+@pytest.fixture(autouse=True)
+def empty_batchers(monkeypatch):
+    monkeypatch.setattr(PredictionBatcher, "_PredictionBatcher__batchers", OrderedDict())
+    monkeypatch.setattr(prediction_batcher._env, "PREDICTION_MAX_MODELS", 2)
+
+
+def test_get_batcher_reuses_the_batcher_of_a_model():
+    assert PredictionBatcher.get_batcher("models/a.h5") is PredictionBatcher.get_batcher("models/a.h5")
+
+
+def test_get_batcher_releases_the_least_recently_used_model():
+    first = PredictionBatcher.get_batcher("models/a.h5")
+    PredictionBatcher.get_batcher("models/b.h5")
+    PredictionBatcher.get_batcher("models/a.h5")
+    PredictionBatcher.get_batcher("models/c.h5")
+
+    assert PredictionBatcher.get_batcher("models/a.h5") is first
+    assert set(PredictionBatcher._PredictionBatcher__batchers) == {"models/a.h5", "models/c.h5"}
@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+import numpy as np
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from prometheus_client import REGISTRY
+from app.core.services import prediction_services
+from app.core.services.prediction_services import PredictionServices
+
+
+class FakeKerasModel:
+    def predict(self, properties, batch_size, verbose):
+        return np.asarray(properties)[:, :1] * 2
+
+
+class FakeArtifactCache:
+    @contextmanager
+    def reading(self, bucket_path):
+        yield f"/tmp/{bucket_path}"
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(prediction_services, "load_model", lambda file_path: FakeKerasModel())
+    monkeypatch.setattr(prediction_services, "get_artifact_cache", lambda: FakeArtifactCache())
+
+
+def model_lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("greywolf_cache_requests_total", {"cache": "model", "result": result}) or 0
+
+
+def test_each_lookup_is_counted_once():
+    services = PredictionServices()
+    hits, misses = model_lookups("hit"), model_lookups("miss")
+
+    services.load_model(bucket_path="models/a.h5")
+    prices = services.predict_batch(bucket_path="models/a.h5", normalized_properties=np.array([[1.0], [2.0]]))
+    services.load_model(bucket_path="models/a.h5")
+    services.predict_batch(bucket_path="models/a.h5", normalized_properties=np.array([[1.0]]))
+
+    assert prices.tolist() == [2.0, 4.0]
+    assert model_lookups("miss") - misses == 1
+    assert model_lookups("hit") - hits == 1
+
+
+def test_predict_batch_loads_a_model_that_was_not_loaded():
+    services = PredictionServices()
+    misses = model_lookups("miss")
+
+    services.load_model(bucket_path="models/a.h5")
+    services.predict_batch(bucket_path="models/b.h5", normalized_properties=np.array([[1.0]]))
+
+    assert model_lookups("miss") - misses == 2
@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import OrderedDict
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.core.services import preprocessing_services
+from app.core.services.preprocessing_services import PreProcessingServices
+from tests.fakes import model_in_db
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replace the artifact loading by a slow counter of loaded model ids"""
+    loaded = []
+
+    def fake_init(self, model=None, model_id=0, **kwargs):
+        time.sleep(0.05)
+        loaded.append(model_id)
+
+    monkeypatch.setattr(PreProcessingServices, "__init__", fake_init)
+    monkeypatch.setattr(PreProcessingServices, "_PreProcessingServices__loaded", OrderedDict())
+    monkeypatch.setattr(PreProcessingServices, "_PreProcessingServices__loading", {})
+    monkeypatch.setattr(preprocessing_services, "LOADED_PREPROCESSINGS", 2)
+    return loaded
+
+
+def test_concurrent_misses_load_the_model_once(loads):
+    model = model_in_db(id=1, preprocessing_pipeline="pipeline-1")
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(PreProcessingServices.from_model(model))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == [1]
+    assert all(result is results[0] for result in results)
+
+
+def test_the_least_recently_used_model_is_evicted(loads):
+    models = {id: model_in_db(id=id, preprocessing_pipeline=f"pipeline-{id}") for id in (1, 2, 3)}
+
+    PreProcessingServices.from_model(models[1])
+    PreProcessingServices.from_model(models[2])
+    PreProcessingServices.from_model(models[1])
+    PreProcessingServices.from_model(models[3])
+    PreProcessingServices.from_model(models[1])
+    PreProcessingServices.from_model(models[2])
+
+    assert loads == [1, 2, 3, 2]
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.core.services.preprocessing_state import PreprocessingState, STATE_VERSION, row_hashes
+
+
+def export(rows):
+    return pd.DataFrame(rows).set_index("id")
+
+
+def features(rows):
+    return export(rows).drop(columns=["flood_quota"])
+
+
+ROWS = [
+    {"id": 1, "rooms": 2, "bathrooms": 1, "size": 50, "parking_space": 1, "neighborhood_name": "centro", "security": 0, "price": 100, "flood_quota": 0},
+    {"id": 2, "rooms": 3, "bathrooms": 2, "size": 80, "parking_space": 1, "neighborhood_name": "batel", "security": 1, "price": 300, "flood_quota": 0},
+]
+
+
+def hashes(rows):
+    return row_hashes(export(rows))
+
+
+def test_only_new_and_changed_rows_are_reported():
+    state = PreprocessingState()
+    state.update(hashes(ROWS), features(ROWS))
+
+    changed = [dict(ROWS[0]), dict(ROWS[1], price=350), dict(ROWS[0], id=3)]
+
+    assert list(state.changed_ids(hashes(changed))) == [2, 3]
+
+
+def test_update_drops_removed_rows_and_their_extrema():
+    state = PreprocessingState()
+    state.update(hashes(ROWS), features(ROWS))
+
+    outdated = state.update(hashes(ROWS[:1]), features(ROWS).iloc[:0])
+
+    assert outdated == 1
+    assert list(state.features.index) == [1]
+    assert state.vocabulary() == ["centro"]
+    assert state.maximum["price"] == 100
+
+
+def test_state_of_another_version_is_discarded():
+    state = PreprocessingState(property_type="apartment")
+    state.update(hashes(ROWS), features(ROWS))
+
+    artifact = state.to_artifact()
+    assert len(PreprocessingState.from_artifact(artifact, property_type="apartment").features) == 2
+    assert len(PreprocessingState.from_artifact(artifact, property_type="house").features) == 0
+    assert len(PreprocessingState.from_artifact(dict(artifact, version=STATE_VERSION + 1), property_type="apartment").features) == 0
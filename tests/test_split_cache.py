@@ -0,0 +1,57 @@
+import os
+import numpy as np
+import pytest
+from scipy import sparse
+from app.core.cache import split_cache
+from app.core.cache.split_cache import SplitCache
+
+
+@pytest.fixture
+def arrays():
+    return {
+        "x_train": sparse.csr_matrix(np.eye(3)),
+        "y_train": np.arange(3.0),
+    }
+
+
+def test_stored_split_is_loaded_memory_mapped(tmp_path, arrays):
+    cache = SplitCache(directory=str(tmp_path), max_splits=2)
+    key = cache.key("snapshot", {"test_size": 0.2})
+
+    assert cache.load(key) is None
+
+    cache.store(key, arrays)
+    loaded = cache.load(key)
+
+    assert isinstance(loaded["y_train"], np.memmap)
+    assert (loaded["x_train"].toarray() == np.eye(3)).all()
+    assert (loaded["y_train"] == np.arange(3.0)).all()
+
+
+def test_split_not_stored_is_returned_in_memory(tmp_path, monkeypatch, arrays):
+    cache = SplitCache(directory=str(tmp_path), max_splits=2)
+
+    def full_disk(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(split_cache.tempfile, "mkdtemp", full_disk)
+
+    assert cache.store("key", arrays) is arrays
+
+    monkeypatch.undo()
+    monkeypatch.setattr(split_cache.np, "save", full_disk)
+
+    assert cache.store("key", arrays) is arrays
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_splits_are_evicted(tmp_path, arrays):
+    cache = SplitCache(directory=str(tmp_path), max_splits=2)
+
+    for index, key in enumerate(("first", "second", "third")):
+        cache.store(key, arrays)
+        os.utime(tmp_path / key, (index, index))
+
+    cache.store("fourth", arrays)
+
+    assert sorted(os.listdir(tmp_path)) == ["fourth", "third"]
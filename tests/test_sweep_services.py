@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import pytest
+
+pytest.importorskip("keras")
+pytest.importorskip("mealpy")
+
+from app.core.entities import PriceSweep
+from app.core.services import sweep_services
+from app.core.services.sweep_services import SweepServices
+from tests.fakes import FakeBatcher, FakePreprocessing, model_in_db
+
+
+@pytest.fixture(autouse=True)
+def fake_batcher(monkeypatch):
+    monkeypatch.setattr(sweep_services.PredictionBatcher, "get_batcher", lambda bucket_path: FakeBatcher())
+
+
+def sweep(**dimension):
+    return PriceSweep(
+        property={"rooms": 2, "bathrooms": 1, "parking_space": 1, "size": 100, "neighborhood_name": "centro"},
+        dimensions=[dimension],
+    )
+
+
+def test_predict_prices_every_grid_point():
+    services = SweepServices(model_in_db=model_in_db(), preprocessing=FakePreprocessing())
+
+    surface = asyncio.run(services.predict(sweep(attribute="size", start=50, stop=70, step=10)))
+
+    assert surface.axes == [[50, 60, 70]]
+    assert surface.predicted_prices == [50000, 60000, 70000]
+
+
+def test_predict_leaves_unknown_neighborhoods_without_price():
+    services = SweepServices(model_in_db=model_in_db(), preprocessing=FakePreprocessing())
+
+    surface = asyncio.run(services.predict(sweep(attribute="neighborhood_name", values=["centro", "nowhere"])))
+
+    assert surface.predicted_prices == [100000, None]
+
+
+def test_predict_encodes_the_grid_off_the_event_loop():
+    preprocessing = FakePreprocessing()
+    services = SweepServices(model_in_db=model_in_db(), preprocessing=preprocessing)
+
+    asyncio.run(services.predict(sweep(attribute="size", values=[50, 60])))
+
+    assert preprocessing.normalize_threads
+    assert threading.main_thread() not in preprocessing.normalize_threads